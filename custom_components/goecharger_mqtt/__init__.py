@@ -1,22 +1,55 @@
 """The go-eCharger (MQTT) integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
 
 from homeassistant.components import mqtt
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
 from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.typing import ConfigType
 import voluptuous as vol
 
+from .cache import LastValueCache
 from .const import (
     ATTR_KEY,
     ATTR_SERIAL_NUMBER,
+    ATTR_SERIAL_NUMBERS,
+    ATTR_TIMEOUT,
     ATTR_VALUE,
+    ATTR_VALUES,
+    CONF_GOE_TOPIC_PREFIX,
+    CONF_PORTAL_ID,
+    CONF_PROFILING,
+    CONF_SERIAL_NUMBER,
+    CONF_VICTRON_TOPIC_PREFIX,
+    DATA_STATE_WRITERS,
     DEFAULT_GOE_TOPIC_PREFIX,
+    DEFAULT_SET_TIMEOUT,
+    DEFAULT_VICTRON_TOPIC_PREFIX,
+    DISCOVERY_QUIET_PERIOD,
+    DISCOVERY_TIMEOUT,
     DOMAIN,
 )
+from .definitions.sensor import VICTRON_SENSORS
+from .dispatcher import (
+    GoEChargerDispatcher,
+    async_acquire_victron_dispatcher,
+    async_release_victron_dispatcher,
+)
+from .entity import is_victron_entry, unique_id
+from .persistence import EntryStateWriter
+from .profiling import DispatchProfiler
+
+try:
+    # >= HA 2023.7.0
+    from homeassistant.core import SupportsResponse
+except ImportError:
+    # < HA 2023.7.0
+    SupportsResponse = None
 
 PLATFORMS: list[str] = [
     "binary_sensor",
@@ -26,6 +59,7 @@ PLATFORMS: list[str] = [
     "select",
     "switch",
 ]
+VICTRON_PLATFORMS: list[str] = ["sensor"]
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,22 +71,150 @@ SERVICE_SCHEMA_SET_CONFIG_KEY = vol.Schema(
     }
 )
 
+SERVICE_SCHEMA_SET_CONFIG_KEYS = vol.Schema(
+    {
+        vol.Optional(ATTR_SERIAL_NUMBERS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_VALUES): vol.Schema(
+            {cv.string: vol.Any(bool, int, float, cv.string)}
+        ),
+        vol.Optional(ATTR_TIMEOUT, default=DEFAULT_SET_TIMEOUT): vol.Coerce(float),
+    }
+)
+
+
+def format_value(value) -> str:
+    """Format a config value the way the charger expects it."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+
+    if not value.isnumeric():
+        if value in ["true", "True"]:
+            value = "true"
+        elif value in ["false", "False"]:
+            value = "false"
+        else:
+            value = f'"{value}"'
+
+    return value
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up go-eCharger (MQTT) from a config entry."""
     hass.data.setdefault(DOMAIN, {})
+
+    if is_victron_entry(entry):
+        dispatcher = await async_acquire_victron_dispatcher(
+            hass, entry.data[CONF_VICTRON_TOPIC_PREFIX], entry.data.get(CONF_PORTAL_ID)
+        )
+        dispatcher.profiler = async_create_profiler(entry)
+        dispatcher.last_values = LastValueCache(
+            await async_setup_state_writer(hass, entry)
+        )
+        hass.data[DOMAIN][entry.entry_id] = dispatcher
+        await hass.config_entries.async_forward_entry_setups(entry, VICTRON_PLATFORMS)
+        entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+        return True
+
+    async_migrate_victron_entities(hass, entry)
+
+    dispatcher = GoEChargerDispatcher(
+        hass, entry.data[CONF_GOE_TOPIC_PREFIX], entry.data[CONF_SERIAL_NUMBER]
+    )
+    dispatcher.profiler = async_create_profiler(entry)
+    dispatcher.last_values = LastValueCache(await async_setup_state_writer(hass, entry))
+    await dispatcher.async_subscribe()
+    await dispatcher.async_discover_keys(DISCOVERY_TIMEOUT, DISCOVERY_QUIET_PERIOD)
+    hass.data[DOMAIN][entry.entry_id] = dispatcher
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     return True
 
 
+@callback
+def async_create_profiler(entry: ConfigEntry) -> DispatchProfiler | None:
+    """Return a profiler if profiling is enabled in the options of the entry."""
+    if entry.options.get(CONF_PROFILING, False):
+        return DispatchProfiler()
+    return None
+
+
+async def async_setup_state_writer(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> EntryStateWriter:
+    """Return the writer of the entry with the state known before the restart."""
+    writer = EntryStateWriter(hass, entry.entry_id)
+    await writer.async_load()
+    entry.async_on_unload(writer.async_start())
+    hass.data.setdefault(DATA_STATE_WRITERS, {})[entry.entry_id] = writer
+    return writer
+
+
+@callback
+def async_migrate_victron_entities(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Move the Victron entities of a charger to the shared Victron entry.
+
+    Chargers used to create their own copy of the Victron entities. These are
+    removed, and the Victron entry is created if it does not exist yet.
+    """
+    registry = er.async_get(hass)
+    for description in VICTRON_SENSORS:
+        entity_id = registry.async_get_entity_id(
+            description.domain,
+            DOMAIN,
+            unique_id(entry.data[CONF_SERIAL_NUMBER], description),
+        )
+        if entity_id is not None:
+            registry.async_remove(entity_id)
+
+    if not any(
+        is_victron_entry(config_entry)
+        for config_entry in hass.config_entries.async_entries(DOMAIN)
+    ):
+        hass.async_create_task(
+            hass.config_entries.flow.async_init(
+                DOMAIN,
+                context={"source": SOURCE_IMPORT},
+                data={CONF_VICTRON_TOPIC_PREFIX: DEFAULT_VICTRON_TOPIC_PREFIX},
+            )
+        )
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    victron = is_victron_entry(entry)
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        entry, VICTRON_PLATFORMS if victron else PLATFORMS
+    )
+
+    if unload_ok:
+        dispatcher = hass.data[DOMAIN].pop(entry.entry_id)
+        # Controllers may keep the shared Victron dispatcher alive, it must
+        # not write to the state of the unloaded entry anymore
+        dispatcher.last_values = None
+        dispatcher.profiler = None
+        await hass.data[DATA_STATE_WRITERS].pop(entry.entry_id).async_flush()
+        if victron:
+            async_release_victron_dispatcher(hass, dispatcher)
+        else:
+            dispatcher.async_unsubscribe()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored state of a removed config entry."""
+    await EntryStateWriter(hass, entry.entry_id).async_remove()
+
+
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up integration."""
 
@@ -62,18 +224,43 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         key = call.data.get("key")
         # @FIXME: Retrieve the topic_prefix from config_entry
         topic = f"{DEFAULT_GOE_TOPIC_PREFIX}/{serial_number}/{key}/set"
-        value = call.data.get("value")
-
-        if not value.isnumeric():
-            if value in ["true", "True"]:
-                value = "true"
-            elif value in ["false", "False"]:
-                value = "false"
-            else:
-                value = f'"{value}"'
+        value = format_value(call.data.get("value"))
 
         await mqtt.async_publish(hass, topic, value)
 
+    async def set_config_keys_service(call: ServiceCall) -> dict:
+        """Set several config keys on one or more chargers concurrently."""
+        dispatchers = {
+            dispatcher.serial_number: dispatcher
+            for dispatcher in hass.data.get(DOMAIN, {}).values()
+            if dispatcher.serial_number is not None
+        }
+        serial_numbers = call.data.get(ATTR_SERIAL_NUMBERS, list(dispatchers))
+        if unknown := [
+            serial for serial in serial_numbers if serial not in dispatchers
+        ]:
+            raise HomeAssistantError(f"Unknown go-eCharger serial numbers: {unknown}")
+
+        writes = [
+            (serial_number, key, format_value(value))
+            for serial_number in serial_numbers
+            for key, value in call.data[ATTR_VALUES].items()
+        ]
+        results = await asyncio.gather(
+            *(
+                dispatchers[serial_number].async_set_config_key(
+                    key, value, call.data[ATTR_TIMEOUT]
+                )
+                for serial_number, key, value in writes
+            )
+        )
+
+        response: dict[str, dict[str, str | None]] = {}
+        for (serial_number, key, _), result in zip(writes, results):
+            response.setdefault(serial_number, {})[key] = result
+
+        return response
+
     hass.services.async_register(
         DOMAIN,
         "set_config_key",
@@ -81,4 +268,20 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         schema=SERVICE_SCHEMA_SET_CONFIG_KEY,
     )
 
+    if SupportsResponse is not None:
+        hass.services.async_register(
+            DOMAIN,
+            "set_config_keys",
+            set_config_keys_service,
+            schema=SERVICE_SCHEMA_SET_CONFIG_KEYS,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+    else:
+        hass.services.async_register(
+            DOMAIN,
+            "set_config_keys",
+            set_config_keys_service,
+            schema=SERVICE_SCHEMA_SET_CONFIG_KEYS,
+        )
+
     return True
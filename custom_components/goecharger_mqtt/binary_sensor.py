@@ -2,7 +2,6 @@
 import logging
 
 from homeassistant import config_entries, core
-from homeassistant.components import mqtt
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.core import callback
 
@@ -10,7 +9,7 @@ from .definitions.binary_sensor import (
     BINARY_SENSORS,
     GoEChargerBinarySensorEntityDescription,
 )
-from .entity import GoEChargerEntity
+from .entity import GoEChargerEntity, async_setup_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -49,10 +48,8 @@ async def async_setup_entry(
     #         f"| `{description.key}` | {description.name} | {entity_category} | {entity_registry_enabled} | {supported} | {reason} |"
     #     )
 
-    async_add_entities(
-        GoEChargerBinarySensor(config_entry, description)
-        for description in BINARY_SENSORS
-        if not description.disabled
+    async_setup_entities(
+        hass, config_entry, async_add_entities, GoEChargerBinarySensor, BINARY_SENSORS
     )
 
 
@@ -60,6 +57,7 @@ class GoEChargerBinarySensor(GoEChargerEntity, BinarySensorEntity):
     """Representation of a go-eCharger sensor that is updated via MQTT."""
 
     entity_description: GoEChargerBinarySensorEntityDescription
+    _value_attr = "_attr_is_on"
 
     def __init__(
         self,
@@ -78,22 +76,11 @@ class GoEChargerBinarySensor(GoEChargerEntity, BinarySensorEntity):
 
     async def async_added_to_hass(self):
         """Subscribe to MQTT events."""
+        decoder = self.entity_description.decoder
 
         @callback
         def message_received(message):
             """Handle new MQTT messages."""
-            if self.entity_description.state is not None:
-                self._attr_is_on = self.entity_description.state(
-                    message.payload, self.entity_description.attribute
-                )
-            else:
-                if message.payload == "true":
-                    self._attr_is_on = True
-                elif message.payload == "false":
-                    self._attr_is_on = False
-                else:
-                    self._attr_is_on = None
-
-            self.async_write_ha_state()
-
-        await mqtt.async_subscribe(self.hass, self._topic, message_received, 1)
+            self.async_update_value(decoder(message))
+
+        await self.async_subscribe_topic(message_received)
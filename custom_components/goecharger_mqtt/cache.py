@@ -0,0 +1,37 @@
+"""Last known payloads of a config entry, persisted across restarts."""
+from __future__ import annotations
+
+from homeassistant.core import callback
+
+from .persistence import EntryStateWriter
+
+SECTION = "last_values"
+
+
+class LastValueCache:
+    """Last payload per topic, used to seed the entities when setting up.
+
+    The raw payloads are stored, not the decoded values, so every entity
+    decodes them like a live message. Changes are written by the state
+    writer of the entry, which batches them and caps the write frequency.
+    """
+
+    def __init__(self, writer: EntryStateWriter) -> None:
+        """Initialize the cache with the payloads stored before the restart."""
+        self._writer = writer
+        self.payloads: dict[str, str] = dict(writer.section(SECTION) or {})
+        writer.async_register(SECTION, self._snapshot)
+
+    @callback
+    def async_record(self, topic: str, payload: str) -> None:
+        """Remember the payload of a topic and schedule a write if it changed."""
+        if self.payloads.get(topic) == payload:
+            return
+
+        self.payloads[topic] = payload
+        self._writer.async_mark_dirty(SECTION)
+
+    @callback
+    def _snapshot(self) -> dict[str, str]:
+        """Return a copy of the payloads to write."""
+        return dict(self.payloads)
@@ -5,13 +5,30 @@ import logging
 from typing import Any
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
 import voluptuous as vol
 
-from .const import CONF_SERIAL_NUMBER, CONF_GOE_TOPIC_PREFIX, DEFAULT_GOE_TOPIC_PREFIX, DOMAIN
+from .const import (
+    CONF_CONTROLLER_TICK,
+    CONF_ENTRY_TYPE,
+    CONF_GOE_TOPIC_PREFIX,
+    CONF_PORTAL_ID,
+    CONF_PROFILING,
+    CONF_SERIAL_NUMBER,
+    CONF_STATISTICS_WINDOWS,
+    CONF_VICTRON_TOPIC_PREFIX,
+    DEFAULT_CONTROLLER_TICK,
+    DEFAULT_GOE_TOPIC_PREFIX,
+    DEFAULT_STATISTICS_WINDOWS,
+    DEFAULT_VICTRON_TOPIC_PREFIX,
+    DOMAIN,
+    ENTRY_TYPE_VICTRON,
+    VICTRON_DEVICE_ID,
+)
+from .entity import is_victron_entry
 
 try:
     # < HA 2022.8.0
@@ -23,15 +40,39 @@ except ImportError:
 _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_NAME = "go-eCharger"
+VICTRON_NAME = "Victron"
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_SERIAL_NUMBER): vol.All(cv.string, vol.Length(min=6, max=6)),
-        vol.Required(CONF_GOE_TOPIC_PREFIX, default=DEFAULT_GOE_TOPIC_PREFIX): cv.string,
+        vol.Required(
+            CONF_GOE_TOPIC_PREFIX, default=DEFAULT_GOE_TOPIC_PREFIX
+        ): cv.string,
+    }
+)
+
+STEP_VICTRON_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Required(
+            CONF_VICTRON_TOPIC_PREFIX, default=DEFAULT_VICTRON_TOPIC_PREFIX
+        ): cv.string,
+        # Read the values from Venus OS dbus-mqtt instead of the topic prefix
+        vol.Optional(CONF_PORTAL_ID): cv.string,
     }
 )
 
 
+def statistics_windows(value: Any) -> list[int]:
+    """Validate a comma separated list of window lengths in seconds."""
+    try:
+        windows = [int(window) for window in cv.string(value).split(",")]
+    except ValueError as err:
+        raise vol.Invalid("Windows must be whole seconds") from err
+    if any(window < 1 or window > 3600 for window in windows):
+        raise vol.Invalid("Windows must be between 1 and 3600 seconds")
+    return sorted(set(windows))
+
+
 class PlaceholderHub:
     """Placeholder class to make tests pass.
 
@@ -72,6 +113,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._serial_number = None
         self._topic_prefix = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_mqtt(self, discovery_info: MqttServiceInfo) -> FlowResult:
         """Handle a flow initialized by MQTT discovery."""
         subscribed_topic = discovery_info.subscribed_topic
@@ -119,9 +168,40 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the initial step."""
+        return self.async_show_menu(step_id="user", menu_options=["charger", "victron"])
+
+    async def async_step_victron(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Set up the Victron topics shared by all chargers."""
+        if user_input is None:
+            return self.async_show_form(
+                step_id="victron", data_schema=STEP_VICTRON_DATA_SCHEMA
+            )
+
+        await self.async_set_unique_id(VICTRON_DEVICE_ID)
+        self._abort_if_unique_id_configured()
+
+        data = {
+            CONF_ENTRY_TYPE: ENTRY_TYPE_VICTRON,
+            CONF_VICTRON_TOPIC_PREFIX: user_input[CONF_VICTRON_TOPIC_PREFIX],
+        }
+        if portal_id := user_input.get(CONF_PORTAL_ID):
+            data[CONF_PORTAL_ID] = portal_id
+
+        return self.async_create_entry(title=VICTRON_NAME, data=data)
+
+    async def async_step_import(self, import_data: dict[str, Any]) -> FlowResult:
+        """Create the Victron entry for chargers set up before it existed."""
+        return await self.async_step_victron(import_data)
+
+    async def async_step_charger(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Set up a charger."""
         if user_input is None:
             return self.async_show_form(
-                step_id="user", data_schema=STEP_USER_DATA_SCHEMA
+                step_id="charger", data_schema=STEP_USER_DATA_SCHEMA
             )
 
         errors = {}
@@ -142,7 +222,56 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return self.async_create_entry(title=info["title"], data=user_input)
 
         return self.async_show_form(
-            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+            step_id="charger", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+        )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of a go-eCharger (MQTT) config entry."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options.
+
+        The windows are entered as text, the frontend cannot render the
+        validator, and parsed here.
+        """
+        errors = {}
+        options = self.config_entry.options
+        windows = options.get(CONF_STATISTICS_WINDOWS, DEFAULT_STATISTICS_WINDOWS)
+        windows_text = ", ".join(str(window) for window in windows)
+
+        if user_input is not None:
+            try:
+                windows = statistics_windows(user_input[CONF_STATISTICS_WINDOWS])
+            except vol.Invalid:
+                errors[CONF_STATISTICS_WINDOWS] = "invalid_statistics_windows"
+                windows_text = user_input[CONF_STATISTICS_WINDOWS]
+            else:
+                return self.async_create_entry(
+                    title="", data={**user_input, CONF_STATISTICS_WINDOWS: windows}
+                )
+
+        schema = {
+            vol.Required(CONF_STATISTICS_WINDOWS, default=windows_text): cv.string,
+            vol.Required(
+                CONF_PROFILING, default=options.get(CONF_PROFILING, False)
+            ): cv.boolean,
+        }
+        # The Victron entry has no surplus controller
+        if not is_victron_entry(self.config_entry):
+            tick = options.get(CONF_CONTROLLER_TICK, DEFAULT_CONTROLLER_TICK)
+            schema[vol.Required(CONF_CONTROLLER_TICK, default=tick)] = vol.All(
+                vol.Coerce(float), vol.Range(min=0.1, max=60)
+            )
+
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema(schema), errors=errors
         )
 
 
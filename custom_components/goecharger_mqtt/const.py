@@ -5,13 +5,85 @@ DOMAIN = "goecharger_mqtt"
 ATTR_SERIAL_NUMBER = "serial_number"
 ATTR_KEY = "key"
 ATTR_VALUE = "value"
+ATTR_VALUES = "values"
+ATTR_SERIAL_NUMBERS = "serial_numbers"
+ATTR_TIMEOUT = "timeout"
 
 CONF_SERIAL_NUMBER = "serial_number"
 CONF_GOE_TOPIC_PREFIX = "topic_prefix"
+CONF_CONTROLLER_TICK = "controller_tick"
+CONF_ENTRY_TYPE = "entry_type"
+CONF_VICTRON_TOPIC_PREFIX = "victron_topic_prefix"
+CONF_PORTAL_ID = "portal_id"
+CONF_STATISTICS_WINDOWS = "statistics_windows"
+CONF_PROFILING = "profiling"
+
+# Config entries without entry type are chargers
+ENTRY_TYPE_VICTRON = "victron"
 
 DEFAULT_GOE_TOPIC_PREFIX = "/go-eCharger"
 
 DEFAULT_VICTRON_TOPIC_PREFIX = "custom"
 
+# Shared Victron dispatchers by topic prefix and Venus OS portal id
+DATA_VICTRON_DISPATCHERS = f"{DOMAIN}_victron_dispatchers"
+DATA_STATE_WRITERS = f"{DOMAIN}_state_writers"
+
+# Seconds between two keep-alives of the Venus OS dbus-mqtt topics, which
+# stop being published 60 seconds after the last one
+VENUS_KEEPALIVE_INTERVAL = 30
+
+# Seconds to wait for the charger to publish its keys when setting up
+DISCOVERY_TIMEOUT = 5
+# Discovery ends early once no new key showed up for this many seconds
+DISCOVERY_QUIET_PERIOD = 1
+
+# Seconds to wait for the <key>/result acknowledgement of a config write
+DEFAULT_SET_TIMEOUT = 10
+
+# Upper bounds in seconds of the config write latency histogram buckets
+WRITE_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Payloads longer than this many characters are decoded in the executor.
+# Below, the thread hand-over costs more than decoding on the event loop.
+LARGE_PAYLOAD_SIZE = 4096
+
+# Version of the stored state of an entry, seconds changes are collected
+# before writing it and seconds between two writes at most
+STORAGE_VERSION = 1
+STATE_WRITE_DELAY = 5
+STATE_WRITE_INTERVAL = 60
+
+# Seconds after which an unchanged value is written to the state machine again
+DEFAULT_MAX_UPDATE_INTERVAL = 300
+
+# PV surplus controller
+SURPLUS_PHASE_VOLTAGE = 230
+SURPLUS_MIN_CURRENT = 6
+SURPLUS_MAX_CURRENT = 16
+# Amperes the surplus must exceed the next current step by before raising it
+SURPLUS_CURRENT_HYSTERESIS = 0.5
+# Watts around the minimum three phase power before switching the phases
+SURPLUS_PHASE_HYSTERESIS = 500
+# Minimum seconds between two changes of amp and psm
+SURPLUS_AMP_INTERVAL = 10
+SURPLUS_PSM_INTERVAL = 300
+# Battery SOC in % above which the battery charging power counts as surplus
+SURPLUS_BATTERY_SOC = 95
+# Seconds the controller waits at least between two recomputes
+DEFAULT_CONTROLLER_TICK = 2
+
+# Seconds covered by the rolling statistics of the power channels
+DEFAULT_STATISTICS_WINDOWS = (10, 60, 300)
+# Samples per second buffered at most by a rolling statistic
+STATISTICS_SAMPLE_RATE = 2
+
+# Seconds between two updates of the profiling sensor and keys it lists
+PROFILING_UPDATE_INTERVAL = 60
+PROFILING_TOP_KEYS = 10
+
 DEVICE_INFO_MANUFACTURER = "go-e"
 DEVICE_INFO_MODEL = "go-eCharger HOME"
+VICTRON_DEVICE_ID = "victron"
+VICTRON_DEVICE_INFO_MANUFACTURER = "Victron Energy"
+VICTRON_DEVICE_INFO_MODEL = "Energy management system"
@@ -0,0 +1,248 @@
+"""PV surplus charging controller for go-eCharger config entries."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+import math
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DEFAULT_SET_TIMEOUT,
+    SURPLUS_AMP_INTERVAL,
+    SURPLUS_BATTERY_SOC,
+    SURPLUS_CURRENT_HYSTERESIS,
+    SURPLUS_MAX_CURRENT,
+    SURPLUS_MIN_CURRENT,
+    SURPLUS_PHASE_HYSTERESIS,
+    SURPLUS_PHASE_VOLTAGE,
+    SURPLUS_PSM_INTERVAL,
+)
+from .dispatcher import GoEChargerDispatcher
+
+_LOGGER = logging.getLogger(__name__)
+
+PSM_SINGLE_PHASE = 1
+PSM_THREE_PHASES = 2
+
+
+def surplus_target(
+    surplus: float, psm: int | None, amp: int | None, switch_phases: bool = True
+) -> tuple[int, int]:
+    """Return the phase switch mode and current to charge a surplus in W with.
+
+    The phases are switched around the minimum three phase power, with
+    SURPLUS_PHASE_HYSTERESIS in both directions. The current is lowered as
+    soon as the surplus drops below it, but only raised once the surplus
+    exceeds the next step by SURPLUS_CURRENT_HYSTERESIS.
+    """
+    three_phase_power = 3 * SURPLUS_MIN_CURRENT * SURPLUS_PHASE_VOLTAGE
+    target_psm = (
+        psm if psm in (PSM_SINGLE_PHASE, PSM_THREE_PHASES) else PSM_SINGLE_PHASE
+    )
+    if switch_phases:
+        if target_psm == PSM_THREE_PHASES:
+            if surplus < three_phase_power - SURPLUS_PHASE_HYSTERESIS:
+                target_psm = PSM_SINGLE_PHASE
+        elif surplus >= three_phase_power + SURPLUS_PHASE_HYSTERESIS:
+            target_psm = PSM_THREE_PHASES
+
+    phases = 3 if target_psm == PSM_THREE_PHASES else 1
+    current = surplus / (phases * SURPLUS_PHASE_VOLTAGE)
+    if amp is None or target_psm != psm or current < amp:
+        target_amp = math.floor(current)
+    elif current >= amp + 1 + SURPLUS_CURRENT_HYSTERESIS:
+        target_amp = math.floor(current - SURPLUS_CURRENT_HYSTERESIS)
+    else:
+        target_amp = amp
+
+    return target_psm, min(max(target_amp, SURPLUS_MIN_CURRENT), SURPLUS_MAX_CURRENT)
+
+
+class SurplusController:
+    """Steer the charge current of a charger towards the PV surplus.
+
+    The surplus is the power the charger draws minus the power drawn from the
+    grid. A discharging battery reduces it, a charging one only adds to it
+    above SURPLUS_BATTERY_SOC. amp and psm are published when their target
+    changed, at most every SURPLUS_AMP_INTERVAL and SURPLUS_PSM_INTERVAL
+    seconds.
+
+    Every input update marks the controller dirty. It recomputes at most once
+    per tick, a burst of updates within a tick is handled by a single
+    recompute with the latest values. A write not yet published is dropped
+    when a newer target for the same key comes in.
+
+    Nothing is published until amp, psm and the power of the charger are
+    known, a target computed from defaults would throttle a charging car.
+
+    Starting and stopping the charging session is left to the charger.
+    Below the minimum current the controller holds SURPLUS_MIN_CURRENT.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        dispatcher: GoEChargerDispatcher,
+        victron_dispatcher: GoEChargerDispatcher,
+        tick: float,
+    ) -> None:
+        """Initialize the controller."""
+        self.hass = hass
+        self._dispatcher = dispatcher
+        self.victron_dispatcher = victron_dispatcher
+        self._tick = tick
+        self._last_recompute = -math.inf
+        self._cancel_recompute: CALLBACK_TYPE | None = None
+        self._writes: dict[str, asyncio.Task] = {}
+        self.grid_power: float | None = None
+        self.battery_power: float | None = None
+        self.battery_soc: float | None = None
+        self.charger_power: float | None = None
+        self.amp: int | None = None
+        self.psm: int | None = None
+        self._amp_changed = -math.inf
+        self._psm_changed = -math.inf
+        self._unregister: list[CALLBACK_TYPE] = []
+
+    @property
+    def surplus(self) -> float | None:
+        """Return the power in W available for charging."""
+        if self.grid_power is None or self.charger_power is None:
+            return None
+
+        surplus = self.charger_power - self.grid_power
+        if self.battery_power is not None and (
+            self.battery_power < 0
+            or (
+                self.battery_soc is not None and self.battery_soc >= SURPLUS_BATTERY_SOC
+            )
+        ):
+            surplus += self.battery_power
+        return surplus
+
+    async def async_start(self) -> None:
+        """Subscribe to the inputs of the controller.
+
+        The dispatchers replay the last message of each input right away. The
+        charger inputs come first, so the replayed Victron values recompute
+        with the current state of the charger.
+        """
+        victron = self.victron_dispatcher
+        charger = self._dispatcher
+        inputs: list[tuple[GoEChargerDispatcher, str, Callable]] = [
+            (charger, "amp", self._input_handler("amp", int)),
+            (charger, "psm", self._input_handler("psm", int)),
+            (charger, "nrg", self._async_nrg_received),
+            (victron, "globalGrid", self._input_handler("grid_power", float)),
+            (victron, "batteryPower", self._input_handler("battery_power", float)),
+            (victron, "batterySOC", self._input_handler("battery_soc", float)),
+        ]
+        for dispatcher, key, msg_callback in inputs:
+            self._unregister.append(
+                await dispatcher.async_register(
+                    f"{dispatcher.base_topic}{key}", msg_callback
+                )
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe from the inputs and drop pending work."""
+        while self._unregister:
+            self._unregister.pop()()
+        if self._cancel_recompute is not None:
+            self._cancel_recompute()
+            self._cancel_recompute = None
+        for task in self._writes.values():
+            task.cancel()
+        self._writes.clear()
+
+    def _input_handler(self, attribute: str, convert: Callable) -> Callable:
+        """Return a callback storing a numeric payload in attribute."""
+
+        @callback
+        def input_received(message) -> None:
+            try:
+                value = convert(message.payload)
+            except ValueError:
+                _LOGGER.debug("Ignoring %s: %s", message.topic, message.payload)
+                return
+
+            if getattr(self, attribute) != value:
+                setattr(self, attribute, value)
+                self.async_mark_dirty()
+
+        return input_received
+
+    @callback
+    def _async_nrg_received(self, message) -> None:
+        """Store the total power drawn by the charger."""
+        if (snapshot := message.nrg) is None:
+            return
+        if (charger_power := snapshot.ptotal) != self.charger_power:
+            self.charger_power = charger_power
+            self.async_mark_dirty()
+
+    @callback
+    def async_mark_dirty(self) -> None:
+        """Recompute now, or once the tick since the last recompute passed."""
+        if self._cancel_recompute is not None:
+            # The scheduled recompute will see the latest values
+            return
+
+        since_last_recompute = time.monotonic() - self._last_recompute
+        if since_last_recompute >= self._tick:
+            self.async_recompute()
+        else:
+            self._cancel_recompute = async_call_later(
+                self.hass, self._tick - since_last_recompute, self._async_tick
+            )
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        self._cancel_recompute = None
+        self.async_recompute()
+
+    @callback
+    def async_recompute(self) -> None:
+        """Publish amp and psm if their target changed and may be changed."""
+        now = self._last_recompute = time.monotonic()
+        if self.psm is None or self.amp is None:
+            return
+        if (surplus := self.surplus) is None:
+            return
+
+        switch_phases = now - self._psm_changed >= SURPLUS_PSM_INTERVAL
+        psm, amp = surplus_target(surplus, self.psm, self.amp, switch_phases)
+
+        if psm != self.psm:
+            self._psm_changed = now
+            self.psm = psm
+            self._async_publish("psm", psm)
+
+        if amp != self.amp and now - self._amp_changed >= SURPLUS_AMP_INTERVAL:
+            self._amp_changed = now
+            self.amp = amp
+            self._async_publish("amp", amp)
+
+    @callback
+    def _async_publish(self, key: str, value: int) -> None:
+        _LOGGER.debug(
+            "Setting %s of %s to %s", key, self._dispatcher.serial_number, value
+        )
+        if (stale := self._writes.get(key)) is not None:
+            stale.cancel()
+
+        task = self._writes[key] = self.hass.async_create_task(
+            self._dispatcher.async_set_config_key(key, str(value), DEFAULT_SET_TIMEOUT)
+        )
+
+        @callback
+        def async_write_done(_task) -> None:
+            if self._writes.get(key) is task:
+                del self._writes[key]
+
+        task.add_done_callback(async_write_done)
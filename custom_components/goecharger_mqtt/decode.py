@@ -0,0 +1,63 @@
+"""JSON decoding of the MQTT payloads.
+
+orjson is used when installed (it ships with Home Assistant), then ujson,
+then the standard library. All backends raise a ValueError subclass for
+invalid payloads.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+
+try:
+    from orjson import loads
+
+    BACKEND = "orjson"
+except ImportError:
+    try:
+        from ujson import loads
+
+        BACKEND = "ujson"
+    except ImportError:
+        from json import loads
+
+        BACKEND = "json"
+
+_CONSTANTS = {"true": True, "false": False, "null": None}
+_MISSING = object()
+
+
+def scalar_fast_path(backend: Callable[[str], object]) -> Callable[[str], object]:
+    """Return a decoder converting scalar payloads without the backend.
+
+    Most keys publish scalars. Numbers, booleans, null and strings without
+    escapes are converted directly, anything else is handed to the backend.
+    """
+
+    def decode(payload: str):
+        if (value := _CONSTANTS.get(payload, _MISSING)) is not _MISSING:
+            return value
+
+        first = payload[:1]
+        if first and first in "-0123456789":
+            if payload.isdecimal() or (first == "-" and payload[1:].isdecimal()):
+                return int(payload)
+            try:
+                return float(payload)
+            except ValueError:
+                pass
+        elif (
+            first == '"'
+            and len(payload) > 1
+            and payload[-1] == '"'
+            and "\\" not in payload
+            and '"' not in payload[1:-1]
+        ):
+            return payload[1:-1]
+
+        return backend(payload)
+
+    return decode
+
+
+# The C backends decode scalars faster than the checks of the fast path take
+decode_json = loads if BACKEND != "json" else scalar_fast_path(loads)
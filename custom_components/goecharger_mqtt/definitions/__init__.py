@@ -2,11 +2,15 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 import logging
+import sys
 
 from homeassistant.helpers.entity import EntityDescription
 
+from ..const import DEFAULT_MAX_UPDATE_INTERVAL
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -109,9 +113,27 @@ class GoEChargerStatusCodes:
     }
 
 
+@lru_cache(maxsize=None)
+def compile_status_codes(mapping_table: str) -> tuple[str | None, ...]:
+    """Return a status code table as tuple of interned texts indexed by code.
+
+    Codes missing in the table, e.g. 0 to 2 of lmo, are None.
+    """
+    codes = getattr(GoEChargerStatusCodes, mapping_table)
+    return tuple(
+        sys.intern(codes[code]) if code in codes else None
+        for code in range(max(codes) + 1)
+    )
+
+
 @dataclass
 class GoEChargerEntityDescription(EntityDescription):
-    """Generic entity description for go-eCharger."""
+    """Generic entity description for go-eCharger.
+
+    state is a factory called once with attribute when the description is
+    created. It returns the decoder turning a received message into the
+    entity value, so indices and lookup tables are resolved up front.
+    """
 
     state: Callable | None = None
     attribute: str = "0"
@@ -119,3 +141,26 @@ class GoEChargerEntityDescription(EntityDescription):
     disabled: bool | None = None
     disabled_reason: str | None = None
     isVictron: bool = False
+    # Venus OS dbus-mqtt paths below N/<portal id>/ summed up for a Victron key
+    venus_paths: tuple[str, ...] = ()
+    deadband: float | None = None
+    min_update_interval: float | None = None
+    max_update_interval: float = DEFAULT_MAX_UPDATE_INTERVAL
+    decoder: Callable | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Compile the decoder."""
+        if self.state is not None:
+            self.decoder = self.state(self.attribute)
+        else:
+            self.decoder = self.default_decoder()
+
+    def default_decoder(self) -> Callable:
+        """Return the decoder for descriptions without state callable."""
+
+        def decode(message):
+            if message.payload == "null":
+                return None
+            return message.payload
+
+        return decode
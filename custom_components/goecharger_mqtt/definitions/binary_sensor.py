@@ -1,8 +1,8 @@
 """Definitions for go-eCharger binary sensors exposed via MQTT."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
-import json
 import logging
 
 from homeassistant.components.binary_sensor import BinarySensorEntityDescription
@@ -21,15 +21,37 @@ class GoEChargerBinarySensorEntityDescription(
 
     domain: str = "binary_sensor"
 
+    def default_decoder(self) -> Callable:
+        """Return the decoder for descriptions without state callable."""
 
-def extract_item_from_array_to_bool(value, key) -> bool:
+        def decode(message) -> bool | None:
+            if message.payload == "true":
+                return True
+            if message.payload == "false":
+                return False
+            return None
+
+        return decode
+
+
+def extract_item_from_array_to_bool(key) -> Callable:
     """Extract item from array to int."""
-    return bool(json.loads(value)[int(key)])
+    index = int(key)
+
+    def decode(message) -> bool:
+        return bool(message.json[index])
 
+    return decode
 
-def map_car_idle_to_bool(value, key) -> bool:
+
+def map_car_idle_to_bool(key) -> Callable:
     """Extract item from array to int."""
-    return int(value) > int(key)
+    threshold = int(key)
+
+    def decode(message) -> bool:
+        return int(message.payload) > threshold
+
+    return decode
 
 
 BINARY_SENSORS: tuple[GoEChargerBinarySensorEntityDescription, ...] = (
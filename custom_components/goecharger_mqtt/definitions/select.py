@@ -1,7 +1,8 @@
 """Definitions for go-eCharger select entities exposed via MQTT."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
 import logging
 
 from homeassistant.components.select import SelectEntityDescription
@@ -16,10 +17,56 @@ _LOGGER = logging.getLogger(__name__)
 class GoEChargerSelectEntityDescription(
     GoEChargerEntityDescription, SelectEntityDescription
 ):
-    """Select entity description for go-eCharger."""
+    """Select entity description for go-eCharger.
+
+    The maps between payloads and options are built once per description
+    and shared by all entities.
+    """
 
     legacy_options: dict[str, str] | None = None
     domain: str = "select"
+    option_by_payload: dict[str, str] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    payload_by_option: dict[str, str] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    option_names: list[str] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Build the option maps and compile the decoder."""
+        for payload, option in self.legacy_options.items():
+            self.option_by_payload[payload] = option
+            self.payload_by_option.setdefault(option, payload)
+        self.option_names = list(self.payload_by_option)
+
+        super().__post_init__()
+
+    def default_decoder(self) -> Callable:
+        """Return the decoder for descriptions without state callable.
+
+        Payloads without exact match are normalized first, so e.g. " 3",
+        '"3"' and "3.0" select the option of "3". Raises KeyError for
+        payloads which are not a valid option.
+        """
+        options = self.option_by_payload
+
+        def decode(message) -> str:
+            if (option := options.get(message.payload)) is not None:
+                return option
+            return options[normalize_payload(message.payload)]
+
+        return decode
+
+
+def normalize_payload(payload: str) -> str:
+    """Return a payload without whitespace and quotes, integral floats as int."""
+    payload = payload.strip().strip('"')
+    try:
+        number = float(payload)
+    except ValueError:
+        return payload
+    return str(int(number)) if number.is_integer() else payload
 
 
 SELECTS: tuple[GoEChargerSelectEntityDescription, ...] = (
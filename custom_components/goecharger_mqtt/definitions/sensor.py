@@ -1,9 +1,11 @@
 """Definitions for go-eCharger sensors exposed via MQTT."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
-import json
+from functools import lru_cache
 import logging
+from operator import attrgetter
 
 from homeassistant.components.sensor import (
     STATE_CLASS_MEASUREMENT,
@@ -19,16 +21,18 @@ from homeassistant.const import (
     FREQUENCY_HERTZ,
     PERCENTAGE,
     POWER_KILO_WATT,
+    POWER_VOLT_AMPERE,
     POWER_WATT,
     SIGNAL_STRENGTH_DECIBELS,
     TEMP_CELSIUS,
     TIME_MILLISECONDS,
     TIME_SECONDS,
-    PERCENTAGE,
 )
 from homeassistant.helpers.entity import EntityCategory
 
-from . import GoEChargerEntityDescription, GoEChargerStatusCodes
+from . import GoEChargerEntityDescription, compile_status_codes
+from ..nrg import NrgSnapshot
+from ..statistics import STATISTICS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -42,78 +46,163 @@ class GoEChargerSensorEntityDescription(
     domain: str = "sensor"
 
 
-def extract_charging_duration(value, attribute) -> int | None:
+def extract_charging_duration(attribute) -> Callable:
     """Extract charging duration from object.
 
     Example value: {"type":1,"value":0}
     """
-    data = json.loads(value)
-    if "type" in data and data["type"] == int(attribute):
-        return data["value"]
+    duration_type = int(attribute)
+
+    def decode(message) -> int | None:
+        data = message.json
+        if "type" in data and data["type"] == duration_type:
+            return data["value"]
+
+        return None
 
-    return None
+    return decode
 
 
-def extract_energy_from_cards(value, key) -> int | None:
+def extract_energy_from_cards(key) -> Callable:
     """Extract energy from selected card of the cards object.
 
     Example value: [{"name":"User 1","energy":0,"cardId":true},{...}, ...]
     """
-    try:
-        data = json.loads(value)[int(key)]
-        return data.get("energy")
-    except IndexError:
-        return None
+    index = int(key)
+
+    def decode(message) -> int | None:
+        try:
+            return message.json[index].get("energy")
+        except IndexError:
+            return None
+
+    return decode
 
 
-def remove_quotes(value, unused):
+def remove_quotes(unused) -> Callable:
     """Remove quotes helper."""
-    return value.replace('"', "")
 
+    def decode(message) -> str:
+        return message.payload.replace('"', "")
 
-def json_array_to_csv(value, unused) -> str:
+    return decode
+
+
+def json_array_to_csv(unused) -> Callable:
     """Transform JSON array to CSV."""
-    if value == "null":
-        return ""
 
-    return ", ".join(json.loads(value))
+    def decode(message) -> str:
+        data = message.json
+        if data is None:
+            return ""
+
+        return ", ".join(data)
 
+    return decode
 
-def extract_item_from_array_to_float(value, key) -> float:
+
+def extract_item_from_array_to_float(key) -> Callable:
     """Extract item from array to float."""
-    return float(json.loads(value)[int(key)])
+    index = int(key)
+
+    def decode(message) -> float:
+        return float(message.json[index])
+
+    return decode
 
 
-def extract_item_from_array_to_int(value, key) -> int:
+def extract_from_nrg(key) -> Callable:
+    """Extract a value from the nrg snapshot by index or accessor name."""
+    name = NrgSnapshot.FIELDS[int(key)] if key.isdigit() else key
+    getter = attrgetter(name)
+
+    def decode(message) -> float | None:
+        if (snapshot := message.nrg) is None:
+            return None
+        return getter(snapshot)
+
+    return decode
+
+
+def extract_item_from_array_to_int(key) -> Callable:
     """Extract item from array to int."""
-    return int(json.loads(value)[int(key)])
+    index = int(key)
+
+    def decode(message) -> int:
+        return int(message.json[index])
+
+    return decode
 
 
-def extract_item_from_array_to_bool(value, key) -> bool:
+def extract_item_from_array_to_bool(key) -> Callable:
     """Extract item from array to int."""
-    return bool(json.loads(value)[int(key)])
+    index = int(key)
 
+    def decode(message) -> bool:
+        return bool(message.json[index])
 
-def transform_code(value, mapping_table) -> str:
-    """Transform codes into a human readable string."""
-    try:
-        return getattr(GoEChargerStatusCodes, mapping_table)[int(value)]
-    except KeyError:
-        return "Definition missing for code %s" % value
+    return decode
+
+
+# Texts of unknown status codes cached per table at most
+UNKNOWN_CODE_CACHE_SIZE = 32
+
+
+def transform_code(mapping_table) -> Callable:
+    """Transform codes into a human readable string.
+
+    The payloads of known codes map to their text directly, converting the
+    payload to int costs more than the lookup. Other payloads, e.g. "03",
+    are parsed and looked up in the dense table. The resulting texts,
+    including the one of unknown codes, are cached by payload.
+    """
+    table = compile_status_codes(mapping_table)
+    texts = {str(code): text for code, text in enumerate(table) if text is not None}
+    known = len(texts)
 
-def roundTwoDecimals(value, unused) -> float:
+    def decode_uncached(payload: str) -> str:
+        try:
+            code = int(payload)
+        except ValueError:
+            code = -1
+        if 0 <= code < len(table) and (text := table[code]) is not None:
+            return text
+        return "Definition missing for code %s" % payload
+
+    def decode(message) -> str:
+        payload = message.payload
+        if (text := texts.get(payload)) is None:
+            text = decode_uncached(payload)
+            if len(texts) < known + UNKNOWN_CODE_CACHE_SIZE:
+                texts[payload] = text
+        return text
+
+    return decode
+
+
+def roundTwoDecimals(unused) -> Callable:
     """Round to two decimals"""
-    return round(float(value), 2)
 
-def roundThreeDecimals(value, unused) -> float:
+    def decode(message) -> float:
+        return round(float(message.payload), 2)
+
+    return decode
+
+
+def roundThreeDecimals(unused) -> Callable:
     """Round to three decimals"""
-    return round(float(value), 3)
+
+    def decode(message) -> float:
+        return round(float(message.payload), 3)
+
+    return decode
 
 
-VICTRON_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = ( 
+VICTRON_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
     GoEChargerSensorEntityDescription(
         key="globalGrid",
         name="Current global power usage",
+        deadband=10,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=POWER_WATT,
@@ -121,10 +210,16 @@ VICTRON_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         entity_registry_enabled_default=True,
         disabled=False,
         isVictron=True,
+        venus_paths=(
+            "system/0/Ac/Grid/L1/Power",
+            "system/0/Ac/Grid/L2/Power",
+            "system/0/Ac/Grid/L3/Power",
+        ),
     ),
     GoEChargerSensorEntityDescription(
         key="batteryPower",
         name="Battery charging power",
+        deadband=10,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=POWER_WATT,
@@ -132,6 +227,7 @@ VICTRON_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         entity_registry_enabled_default=True,
         disabled=False,
         isVictron=True,
+        venus_paths=("system/0/Dc/Battery/Power",),
     ),
     GoEChargerSensorEntityDescription(
         key="batteryVoltage",
@@ -144,6 +240,7 @@ VICTRON_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         entity_registry_enabled_default=True,
         disabled=False,
         isVictron=True,
+        venus_paths=("system/0/Dc/Battery/Voltage",),
     ),
     GoEChargerSensorEntityDescription(
         key="batteryCurrent",
@@ -156,6 +253,7 @@ VICTRON_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         entity_registry_enabled_default=True,
         disabled=False,
         isVictron=True,
+        venus_paths=("system/0/Dc/Battery/Current",),
     ),
     GoEChargerSensorEntityDescription(
         key="batterySOC",
@@ -167,7 +265,8 @@ VICTRON_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         entity_registry_enabled_default=True,
         disabled=False,
         isVictron=True,
-    )
+        venus_paths=("system/0/Dc/Battery/Soc",),
+    ),
 )
 
 GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
@@ -1280,6 +1379,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
     GoEChargerSensorEntityDescription(
         key="fhz",
         name="Grid frequency",
+        min_update_interval=10,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=None,
         native_unit_of_measurement=FREQUENCY_HERTZ,
@@ -1412,6 +1512,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
     GoEChargerSensorEntityDescription(
         key="loc",
         name="Local time",
+        min_update_interval=60,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=None,
         native_unit_of_measurement=None,
@@ -1527,7 +1628,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="0",
         name="Voltage L1",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=ELECTRIC_POTENTIAL_VOLT,
@@ -1539,7 +1640,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="1",
         name="Voltage L2",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=ELECTRIC_POTENTIAL_VOLT,
@@ -1551,7 +1652,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="2",
         name="Voltage L3",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=ELECTRIC_POTENTIAL_VOLT,
@@ -1563,7 +1664,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="3",
         name="Voltage N",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=ELECTRIC_POTENTIAL_VOLT,
@@ -1575,7 +1676,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="4",
         name="Current L1",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=ELECTRIC_CURRENT_AMPERE,
@@ -1587,7 +1688,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="5",
         name="Current L2",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=ELECTRIC_CURRENT_AMPERE,
@@ -1599,7 +1700,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="6",
         name="Current L3",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=ELECTRIC_CURRENT_AMPERE,
@@ -1611,7 +1712,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="7",
         name="Power L1",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=POWER_WATT,
@@ -1623,7 +1724,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="8",
         name="Power L2",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=POWER_WATT,
@@ -1635,7 +1736,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="9",
         name="Power L3",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=POWER_WATT,
@@ -1647,7 +1748,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="10",
         name="Power N",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=POWER_WATT,
@@ -1659,7 +1760,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="11",
         name="Current power",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=POWER_WATT,
@@ -1671,7 +1772,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="12",
         name="Power factor L1",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER_FACTOR,
         native_unit_of_measurement=PERCENTAGE,
@@ -1683,7 +1784,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="13",
         name="Power factor L2",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER_FACTOR,
         native_unit_of_measurement=PERCENTAGE,
@@ -1695,7 +1796,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="14",
         name="Power factor L3",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER_FACTOR,
         native_unit_of_measurement=PERCENTAGE,
@@ -1707,7 +1808,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         key="nrg",
         attribute="15",
         name="Power factor N",
-        state=extract_item_from_array_to_float,
+        state=extract_from_nrg,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.POWER_FACTOR,
         native_unit_of_measurement=PERCENTAGE,
@@ -1715,6 +1816,42 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         entity_registry_enabled_default=True,
         disabled=False,
     ),
+    GoEChargerSensorEntityDescription(
+        key="nrg",
+        attribute="s1",
+        name="Apparent power L1",
+        state=extract_from_nrg,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        device_class=SensorDeviceClass.APPARENT_POWER,
+        native_unit_of_measurement=POWER_VOLT_AMPERE,
+        state_class=STATE_CLASS_MEASUREMENT,
+        entity_registry_enabled_default=False,
+        disabled=False,
+    ),
+    GoEChargerSensorEntityDescription(
+        key="nrg",
+        attribute="s2",
+        name="Apparent power L2",
+        state=extract_from_nrg,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        device_class=SensorDeviceClass.APPARENT_POWER,
+        native_unit_of_measurement=POWER_VOLT_AMPERE,
+        state_class=STATE_CLASS_MEASUREMENT,
+        entity_registry_enabled_default=False,
+        disabled=False,
+    ),
+    GoEChargerSensorEntityDescription(
+        key="nrg",
+        attribute="s3",
+        name="Apparent power L3",
+        state=extract_from_nrg,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        device_class=SensorDeviceClass.APPARENT_POWER,
+        native_unit_of_measurement=POWER_VOLT_AMPERE,
+        state_class=STATE_CLASS_MEASUREMENT,
+        entity_registry_enabled_default=False,
+        disabled=False,
+    ),
     GoEChargerSensorEntityDescription(
         key="oca",
         name="OTA cloud app description",
@@ -1841,6 +1978,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
     GoEChargerSensorEntityDescription(
         key="rbt",
         name="Uptime",
+        min_update_interval=60,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=None,
         native_unit_of_measurement=None,
@@ -1885,6 +2023,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
     GoEChargerSensorEntityDescription(
         key="rssi",
         name="WiFi signal strength",
+        min_update_interval=30,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.SIGNAL_STRENGTH,
         native_unit_of_measurement=SIGNAL_STRENGTH_DECIBELS,
@@ -1928,6 +2067,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
     GoEChargerSensorEntityDescription(
         key="tma",
         name="Temperature sensor 1",
+        deadband=0.5,
         state=extract_item_from_array_to_float,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TEMPERATURE,
@@ -1940,6 +2080,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
     GoEChargerSensorEntityDescription(
         key="tma",
         name="Temperature sensor 2",
+        deadband=0.5,
         state=extract_item_from_array_to_float,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TEMPERATURE,
@@ -1984,6 +2125,7 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
     GoEChargerSensorEntityDescription(
         key="utc",
         name="UTC time",
+        min_update_interval=60,
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=None,
         native_unit_of_measurement=None,
@@ -2208,3 +2350,103 @@ GOE_SENSORS: tuple[GoEChargerSensorEntityDescription, ...] = (
         disabled=False,
     ),
 )
+
+# Not bound to a key, fed by the write tracker of the dispatcher
+WRITE_LATENCY_SENSOR = GoEChargerSensorEntityDescription(
+    key="write_latency",
+    name="Config write latency",
+    entity_category=EntityCategory.DIAGNOSTIC,
+    device_class=SensorDeviceClass.DURATION,
+    native_unit_of_measurement=TIME_MILLISECONDS,
+    state_class=STATE_CLASS_MEASUREMENT,
+    entity_registry_enabled_default=True,
+    disabled=False,
+)
+
+# Not bound to a key, only added while the dispatcher is profiled
+PROFILING_SENSOR = GoEChargerSensorEntityDescription(
+    key="profiling",
+    name="Hottest key",
+    icon="mdi:speedometer",
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=True,
+    disabled=False,
+)
+
+
+@dataclass
+class GoEChargerStatisticSensorEntityDescription(GoEChargerSensorEntityDescription):
+    """Rolling statistic of a power channel over the last window seconds.
+
+    The decoder turns a message into a sample of the channel, attribute only
+    makes the unique id distinct.
+    """
+
+    source_attribute: str = "0"
+    statistic: str = "mean"
+    window: int = 60
+
+    def __post_init__(self) -> None:
+        """Compile the sample decoder."""
+        self.decoder = self.state(self.source_attribute)
+
+
+def payload_to_float(unused) -> Callable:
+    """Transform the payload to float."""
+
+    def decode(message) -> float | None:
+        if message.payload == "null":
+            return None
+        return float(message.payload)
+
+    return decode
+
+
+# Power channels with rolling statistics
+GOE_STATISTIC_SOURCES = tuple(
+    description
+    for description in GOE_SENSORS
+    if description.key == "nrg" and description.attribute in ("7", "8", "9", "11")
+)
+VICTRON_STATISTIC_SOURCES = tuple(
+    description
+    for description in VICTRON_SENSORS
+    if description.key in ("globalGrid", "batteryPower")
+)
+
+
+@lru_cache(maxsize=None)
+def statistic_descriptions(
+    victron: bool, windows: tuple[int, ...]
+) -> tuple[GoEChargerStatisticSensorEntityDescription, ...]:
+    """Return the statistic descriptions of the power channels for every window.
+
+    Cached, so all chargers with the same windows share the descriptions.
+    """
+    sources = VICTRON_STATISTIC_SOURCES if victron else GOE_STATISTIC_SOURCES
+    return tuple(
+        GoEChargerStatisticSensorEntityDescription(
+            key=source.key,
+            attribute=(
+                f"{statistic}-{window}s"
+                if source.isVictron
+                else f"{source.attribute}-{statistic}-{window}s"
+            ),
+            source_attribute=source.attribute,
+            statistic=statistic,
+            window=window,
+            name=f"{source.name} {statistic} {window}s",
+            state=source.state or payload_to_float,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            device_class=SensorDeviceClass.POWER,
+            native_unit_of_measurement=POWER_WATT,
+            state_class=STATE_CLASS_MEASUREMENT,
+            entity_registry_enabled_default=False,
+            disabled=False,
+            isVictron=source.isVictron,
+            min_update_interval=window / 10,
+        )
+        for source in sources
+        for window in windows
+        for statistic in STATISTICS
+    )
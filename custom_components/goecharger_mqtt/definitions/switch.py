@@ -1,6 +1,7 @@
 """Definitions for go-eCharger switches exposed via MQTT."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
 import logging
 
@@ -23,6 +24,20 @@ class GoEChargerSwitchEntityDescription(
     payload_off: str = "false"
     optimistic: bool = False
 
+    def default_decoder(self) -> Callable:
+        """Return the decoder for descriptions without state callable."""
+        payload_on = self.payload_on
+        payload_off = self.payload_off
+
+        def decode(message) -> bool | None:
+            if message.payload == payload_on:
+                return True
+            if message.payload == payload_off:
+                return False
+            return None
+
+        return decode
+
 
 SWITCHES: tuple[GoEChargerSwitchEntityDescription, ...] = (
     GoEChargerSwitchEntityDescription(
@@ -197,3 +212,14 @@ SWITCHES: tuple[GoEChargerSwitchEntityDescription, ...] = (
         disabled=False,
     ),
 )
+
+# Not bound to a key, turns the PV surplus controller on and off
+SURPLUS_CONTROL_SWITCH = GoEChargerSwitchEntityDescription(
+    key="surplus_control",
+    name="PV surplus control",
+    entity_category=EntityCategory.CONFIG,
+    device_class=None,
+    icon="mdi:solar-power",
+    entity_registry_enabled_default=True,
+    disabled=False,
+)
@@ -0,0 +1,30 @@
+"""Diagnostics support for go-eCharger (MQTT)."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the diagnostics of a config entry.
+
+    The per key counters are only included if profiling is enabled in the
+    options of the entry.
+    """
+    dispatcher = hass.data[DOMAIN][entry.entry_id]
+    profiler = dispatcher.profiler
+
+    return {
+        "data": dict(entry.data),
+        "options": dict(entry.options),
+        "base_topic": dispatcher.base_topic,
+        "published_keys": sorted(dispatcher.keys),
+        "write_latency": dispatcher.write_latency.as_dict(),
+        "profiling": None if profiler is None else profiler.as_dict(),
+    }
@@ -0,0 +1,631 @@
+"""Shared MQTT subscriptions for go-eCharger config entries."""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from datetime import timedelta
+import logging
+from time import perf_counter
+
+from homeassistant.components import mqtt
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .cache import LastValueCache
+from .const import (
+    DATA_VICTRON_DISPATCHERS,
+    LARGE_PAYLOAD_SIZE,
+    VENUS_KEEPALIVE_INTERVAL,
+    WRITE_LATENCY_BUCKETS,
+)
+from .decode import decode_json
+from .definitions import GoEChargerEntityDescription
+from .definitions.sensor import VICTRON_SENSORS
+from .nrg import NrgSnapshot
+from .profiling import DispatchProfiler, KeyProfile
+
+_LOGGER = logging.getLogger(__name__)
+
+_UNDECODED = object()
+
+
+def topic_matches(subscription: str, topic: str) -> bool:
+    """Return True if topic matches the (wildcard) subscription."""
+    subscription_levels = subscription.split("/")
+    topic_levels = topic.split("/")
+
+    for index, level in enumerate(subscription_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level not in ("+", topic_levels[index]):
+            return False
+
+    return len(subscription_levels) == len(topic_levels)
+
+
+class GoEChargerMessage:
+    """MQTT message whose JSON payload is decoded at most once.
+
+    The same instance is handed to every entity bound to the topic, so the
+    first entity needing the decoded payload pays for it and the others reuse
+    the result.
+    """
+
+    __slots__ = ("topic", "payload", "_json", "_nrg")
+
+    def __init__(self, topic: str, payload: str) -> None:
+        """Initialize the message."""
+        self.topic = topic
+        self.payload = payload
+        self._json = _UNDECODED
+        self._nrg = _UNDECODED
+
+    @property
+    def json(self):
+        """Return the decoded JSON payload."""
+        if self._json is _UNDECODED:
+            self._json = decode_json(self.payload)
+        return self._json
+
+    @property
+    def nrg(self) -> NrgSnapshot | None:
+        """Return the snapshot of an nrg payload, None if it is invalid."""
+        if self._nrg is _UNDECODED:
+            self._nrg = NrgSnapshot.from_json(self.json)
+        return self._nrg
+
+
+class ProfiledMessage(GoEChargerMessage):
+    """Message recording the time spent decoding its payload."""
+
+    __slots__ = ("_profile",)
+
+    def __init__(self, topic: str, payload: str, profile: KeyProfile) -> None:
+        """Initialize the message."""
+        super().__init__(topic, payload)
+        self._profile = profile
+
+    @property
+    def json(self):
+        """Return the decoded JSON payload."""
+        if self._json is _UNDECODED:
+            start = perf_counter()
+            try:
+                self._json = decode_json(self.payload)
+            finally:
+                self._profile.decodes += 1
+                self._profile.decode_seconds += perf_counter() - start
+        return self._json
+
+
+class WriteLatencyHistogram:
+    """Round-trip latencies of the config writes of a charger.
+
+    A write is measured from publishing <key>/set until the charger answers on
+    <key>/result. Writes not answered in time are counted as timeouts.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = WRITE_LATENCY_BUCKETS) -> None:
+        """Initialize the histogram."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.last: float | None = None
+        self.timeouts = 0
+        self._listeners: list[Callable[[], None]] = []
+
+    @callback
+    def async_record(self, latency: float) -> None:
+        """Record the latency of a confirmed write."""
+        self.counts[bisect_left(self.buckets, latency)] += 1
+        self.count += 1
+        self.sum += latency
+        self.last = latency
+        self._async_notify()
+
+    @callback
+    def async_record_timeout(self) -> None:
+        """Record a write the charger did not confirm."""
+        self.timeouts += 1
+        self._async_notify()
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call listener whenever a write was recorded."""
+        self._listeners.append(listener)
+
+        @callback
+        def async_remove_listener() -> None:
+            """Remove the listener again."""
+            self._listeners.remove(listener)
+
+        return async_remove_listener
+
+    @callback
+    def _async_notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
+
+    def as_dict(self) -> dict:
+        """Return the histogram with cumulative bucket counts."""
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "inf"), self.counts):
+            cumulative += count
+            buckets[f"le_{bound}"] = cumulative
+
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "mean": round(self.sum / self.count, 3) if self.count else None,
+            "timeouts": self.timeouts,
+            "buckets": buckets,
+        }
+
+
+class GoEChargerDispatcher:
+    """Subscribe once per charger and fan out messages to the entities.
+
+    All topics below <prefix>/<serial>/ are covered by a single wildcard
+    subscription. Topics outside of it get one subscription per distinct
+    topic, shared by all entities using it. Without serial number the
+    dispatcher covers <prefix>/, which is used for the Victron topics.
+
+    The wildcard subscription also tells which keys the charger publishes,
+    see async_discover_keys and async_add_key_listener. The last message of
+    each topic is kept and handed to callbacks registered later, like a
+    retained message.
+
+    With last_values set, the last payload of each topic is persisted to
+    seed the entities after a restart. With a profiler set, the messages,
+    decode and callback times, state writes and exceptions are counted per
+    key.
+
+    Payloads longer than LARGE_PAYLOAD_SIZE, e.g. cards or the full config
+    dump on connect, are decoded in the executor and handed out once
+    decoded. A newer message of the topic arriving meanwhile supersedes it.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, topic_prefix: str, serial_number: str | None = None
+    ) -> None:
+        """Initialize the dispatcher."""
+        self.hass = hass
+        self.serial_number = serial_number
+        if serial_number is None:
+            self._base_topic = f"{topic_prefix}/"
+        else:
+            self._base_topic = f"{topic_prefix}/{serial_number}/"
+        # Number of config entries and controllers sharing a Victron dispatcher
+        self.users = 0
+        # Venus OS portal id the values are read from, None if re-published
+        self.portal_id: str | None = None
+        self._callbacks: dict[str, list[Callable]] = {}
+        self._routes: dict[str, tuple[Callable, ...]] = {}
+        self._subscriptions: dict[str, CALLBACK_TYPE | None] = {}
+        self._last_messages: dict[str, GoEChargerMessage] = {}
+        self.keys: set[str] = set()
+        self._key_listeners: list[Callable] = []
+        self._new_key = asyncio.Event()
+        self._pending_results: dict[str, list[asyncio.Future]] = {}
+        self.write_latency = WriteLatencyHistogram()
+        self.profiler: DispatchProfiler | None = None
+        self.last_values: LastValueCache | None = None
+        # Token of the executor decode in progress by topic
+        self._decoding: dict[str, object] = {}
+
+    @property
+    def base_topic(self) -> str:
+        """Return the topic prefix of the charger keys, ending with a slash."""
+        return self._base_topic
+
+    def profile_key(self, topic: str) -> str:
+        """Return the key a topic is profiled under, e.g. nrg or amp/result."""
+        if topic.startswith(self._base_topic):
+            return topic[len(self._base_topic) :]
+        return topic
+
+    async def async_subscribe(self) -> None:
+        """Subscribe to all topics of the charger."""
+        topic = f"{self._base_topic}#"
+        self._subscriptions[topic] = await mqtt.async_subscribe(
+            self.hass, topic, self._async_message_received, 1
+        )
+
+    async def async_discover_keys(self, timeout: float, quiet_period: float) -> None:
+        """Wait for the charger to publish its keys.
+
+        Returns once no new key showed up for quiet_period seconds, at the
+        latest after timeout seconds.
+        """
+        deadline = self.hass.loop.time() + timeout
+        while (remaining := deadline - self.hass.loop.time()) > 0:
+            self._new_key.clear()
+            try:
+                await asyncio.wait_for(
+                    self._new_key.wait(), min(quiet_period, remaining)
+                )
+            except asyncio.TimeoutError:
+                return
+
+        _LOGGER.debug(
+            "Charger %s still publishing new keys after %ss",
+            self._base_topic,
+            timeout,
+        )
+
+    def is_published(self, key: str) -> bool:
+        """Return True if the charger published key.
+
+        Without any key seen (e.g. the charger is offline) every key counts
+        as published.
+        """
+        return not self.keys or key in self.keys
+
+    @callback
+    def async_add_key_listener(self, listener: Callable) -> CALLBACK_TYPE:
+        """Call listener with key and message whenever a new key shows up."""
+        self._key_listeners.append(listener)
+
+        @callback
+        def async_remove_listener() -> None:
+            """Remove the listener again."""
+            self._key_listeners.remove(listener)
+
+        return async_remove_listener
+
+    @callback
+    def async_unsubscribe(self) -> None:
+        """Drop all MQTT subscriptions."""
+        for unsubscribe in self._subscriptions.values():
+            if unsubscribe is not None:
+                unsubscribe()
+        self._subscriptions.clear()
+        self._callbacks.clear()
+        self._routes.clear()
+        self._key_listeners.clear()
+        self._last_messages.clear()
+        self._decoding.clear()
+
+    async def async_set_config_key(self, key: str, value, timeout: float) -> str | None:
+        """Set a config key and wait for the charger to acknowledge it.
+
+        Returns the payload of the <key>/result message, or None if it did not
+        arrive within timeout seconds. Concurrent writes of the same key are
+        all confirmed by the first result. The round-trip latency is recorded
+        in write_latency.
+        """
+        future = self.hass.loop.create_future()
+        self._pending_results.setdefault(key, []).append(future)
+        try:
+            start = self.hass.loop.time()
+            await mqtt.async_publish(self.hass, f"{self._base_topic}{key}/set", value)
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                "go-eCharger %s did not confirm setting %s", self.serial_number, key
+            )
+            self.write_latency.async_record_timeout()
+            return None
+        else:
+            self.write_latency.async_record(self.hass.loop.time() - start)
+            return result
+        finally:
+            futures = self._pending_results[key]
+            futures.remove(future)
+            if not futures:
+                del self._pending_results[key]
+
+    async def async_register(self, topic: str, msg_callback: Callable) -> CALLBACK_TYPE:
+        """Register a callback for a topic and return a function to unregister it.
+
+        The callback is called right away with the last message received for
+        the topic, if any.
+        """
+        self._callbacks.setdefault(topic, []).append(msg_callback)
+        self._routes.clear()
+
+        if "+" in topic or "#" in topic:
+            replay = [
+                last_message
+                for last_topic, last_message in self._last_messages.items()
+                if topic_matches(topic, last_topic)
+            ]
+        elif (last_message := self._last_messages.get(topic)) is not None:
+            replay = [last_message]
+        else:
+            replay = []
+        for last_message in replay:
+            try:
+                msg_callback(last_message)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling %s", last_message.topic)
+
+        if not topic.startswith(self._base_topic) and topic not in self._subscriptions:
+            # Reserve the slot so concurrent registrations do not subscribe twice
+            self._subscriptions[topic] = None
+            self._subscriptions[topic] = await mqtt.async_subscribe(
+                self.hass, topic, self._async_message_received, 1
+            )
+
+        @callback
+        def async_unregister() -> None:
+            """Remove the callback again."""
+            callbacks = self._callbacks.get(topic)
+            if callbacks is None or msg_callback not in callbacks:
+                return
+
+            callbacks.remove(msg_callback)
+            self._routes.clear()
+
+            if not callbacks:
+                del self._callbacks[topic]
+                unsubscribe = self._subscriptions.pop(topic, None)
+                if unsubscribe is not None:
+                    unsubscribe()
+
+        return async_unregister
+
+    def _resolve(self, topic: str) -> tuple[Callable, ...]:
+        """Collect the callbacks of all registrations matching a topic."""
+        return tuple(
+            msg_callback
+            for subscription, callbacks in self._callbacks.items()
+            if subscription == topic or topic_matches(subscription, topic)
+            for msg_callback in callbacks
+        )
+
+    @callback
+    def _async_message_received(self, message) -> None:
+        """Fan out a MQTT message to the registered callbacks."""
+        callbacks = self._routes.get(message.topic)
+        if callbacks is None:
+            callbacks = self._routes[message.topic] = self._resolve(message.topic)
+            if message.topic.startswith(self._base_topic):
+                # Only <base>/<key> counts, not <key>/result or our <key>/set
+                key = message.topic[len(self._base_topic) :]
+                if "/" not in key and key not in self.keys:
+                    self._async_key_discovered(key, message)
+
+        if self._pending_results and message.topic.endswith("/result"):
+            self._async_resolve_result(message)
+
+        if self.last_values is not None and not message.topic.endswith("/set"):
+            self.last_values.async_record(message.topic, message.payload)
+
+        if self._decoding:
+            # Supersedes a large payload of the topic still being decoded
+            self._decoding.pop(message.topic, None)
+
+        if callbacks and len(message.payload) > LARGE_PAYLOAD_SIZE:
+            token = self._decoding[message.topic] = object()
+            self.hass.async_create_task(
+                self._async_decode_in_executor(message.topic, message.payload, token)
+            )
+            return
+
+        if self.profiler is not None:
+            self._async_fan_out_profiled(message, callbacks)
+            return
+
+        decoded = self._last_messages[message.topic] = GoEChargerMessage(
+            message.topic, message.payload
+        )
+        for msg_callback in callbacks:
+            try:
+                msg_callback(decoded)
+            except Exception:  # pylint: disable=broad-except
+                # One entity failing must not keep the others from updating
+                _LOGGER.exception("Error handling %s", message.topic)
+
+    async def _async_decode_in_executor(
+        self, topic: str, payload: str, token: object
+    ) -> None:
+        """Decode a large payload in the executor, then fan it out."""
+        start = perf_counter()
+        try:
+            data = await self.hass.async_add_executor_job(decode_json, payload)
+        except ValueError:
+            # Left to the decoders of the entities, which report it
+            data = _UNDECODED
+        elapsed = perf_counter() - start
+
+        if self._decoding.get(topic) is not token:
+            return
+        del self._decoding[topic]
+
+        callbacks = self._routes.get(topic)
+        if callbacks is None:
+            callbacks = self._routes[topic] = self._resolve(topic)
+        message = GoEChargerMessage(topic, payload)
+        if self.profiler is not None:
+            self._async_fan_out_profiled(message, callbacks, data, elapsed)
+            return
+
+        message._json = data
+        self._last_messages[topic] = message
+        for msg_callback in callbacks:
+            try:
+                msg_callback(message)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling %s", topic)
+
+    @callback
+    def _async_fan_out_profiled(
+        self,
+        message,
+        callbacks: tuple[Callable, ...],
+        data=_UNDECODED,
+        decode_seconds: float = 0.0,
+    ) -> None:
+        """Fan out a MQTT message and count its cost.
+
+        data is the payload already decoded in the executor, if any.
+        """
+        profile = self.profiler.key(self.profile_key(message.topic))
+        profile.messages += 1
+
+        decoded = self._last_messages[message.topic] = ProfiledMessage(
+            message.topic, message.payload, profile
+        )
+        if data is not _UNDECODED:
+            decoded._json = data
+            profile.decodes += 1
+            profile.decode_seconds += decode_seconds
+        start = perf_counter()
+        for msg_callback in callbacks:
+            try:
+                msg_callback(decoded)
+            except Exception:  # pylint: disable=broad-except
+                profile.exceptions += 1
+                _LOGGER.exception("Error handling %s", message.topic)
+        profile.callback_seconds += perf_counter() - start
+
+    @callback
+    def _async_resolve_result(self, message) -> None:
+        """Hand a <key>/result message to the writes waiting for it."""
+        key = message.topic[len(self._base_topic) : -len("/result")]
+        for future in self._pending_results.get(key, ()):
+            if not future.done():
+                future.set_result(message.payload)
+
+    @callback
+    def _async_key_discovered(self, key: str, message) -> None:
+        """Record a key published for the first time."""
+        self.keys.add(key)
+        self._new_key.set()
+
+        if self._key_listeners:
+            decoded = GoEChargerMessage(message.topic, message.payload)
+            for listener in list(self._key_listeners):
+                listener(key, decoded)
+
+
+class VenusDispatcher(GoEChargerDispatcher):
+    """Victron dispatcher reading the Venus OS dbus-mqtt topics directly.
+
+    The value of a Victron key is read from the N/<portal id>/<path> topics
+    of the venus_paths of its description. The {"value": ...} payloads of
+    several paths, e.g. the grid power of the phases, are summed up. The
+    result is handed out on <prefix>/<key> like a re-published value, so
+    entities and controllers do not care where it comes from.
+
+    dbus-mqtt only publishes while R/<portal id>/keepalive is written to.
+    The first keep-alive asks for all values, later ones only keep the
+    publishing alive.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        topic_prefix: str,
+        portal_id: str,
+        descriptions: Iterable[GoEChargerEntityDescription],
+    ) -> None:
+        """Initialize the dispatcher."""
+        super().__init__(hass, topic_prefix)
+        self.portal_id = portal_id
+        self._paths: dict[str, tuple[str, int]] = {}
+        self._values: dict[str, list[float | None]] = {}
+        self._keepalive_payload = ""
+        self._cancel_keepalive: CALLBACK_TYPE | None = None
+
+        for description in descriptions:
+            for index, path in enumerate(description.venus_paths):
+                self._paths[f"N/{portal_id}/{path}"] = (description.key, index)
+            self._values[description.key] = [None] * len(description.venus_paths)
+
+    async def async_subscribe(self) -> None:
+        """Subscribe to the Venus OS paths and start the keep-alive."""
+        for topic in self._paths:
+            self._subscriptions[topic] = await mqtt.async_subscribe(
+                self.hass, topic, self._async_venus_message_received, 0
+            )
+
+        await self._async_keepalive()
+        self._cancel_keepalive = async_track_time_interval(
+            self.hass,
+            self._async_keepalive,
+            timedelta(seconds=VENUS_KEEPALIVE_INTERVAL),
+        )
+
+    @callback
+    def async_unsubscribe(self) -> None:
+        """Stop the keep-alive and drop all MQTT subscriptions."""
+        if self._cancel_keepalive is not None:
+            self._cancel_keepalive()
+            self._cancel_keepalive = None
+        super().async_unsubscribe()
+
+    async def _async_keepalive(self, _now=None) -> None:
+        """Keep dbus-mqtt publishing."""
+        await mqtt.async_publish(
+            self.hass, f"R/{self.portal_id}/keepalive", self._keepalive_payload
+        )
+        self._keepalive_payload = '{"keepalive-options": ["suppress-republish"]}'
+
+    @callback
+    def _async_venus_message_received(self, message) -> None:
+        """Decode a Venus OS value and hand out the value of its key."""
+        key, index = self._paths[message.topic]
+        try:
+            value = decode_json(message.payload)["value"]
+        except (ValueError, KeyError, TypeError):
+            _LOGGER.debug("Ignoring %s: %s", message.topic, message.payload)
+            return
+
+        values = self._values[key]
+        values[index] = value
+        if all(value is None for value in values):
+            payload = "null"
+        else:
+            # Paths without value, e.g. the missing phases, count as 0
+            payload = str(sum(value for value in values if value is not None))
+
+        self._async_message_received(
+            GoEChargerMessage(f"{self._base_topic}{key}", payload)
+        )
+
+
+async def async_acquire_victron_dispatcher(
+    hass: HomeAssistant, topic_prefix: str, portal_id: str | None = None
+) -> GoEChargerDispatcher:
+    """Return the dispatcher of the Victron topics, subscribing on first use.
+
+    The Victron entry and the controllers of all chargers share it, so each
+    Victron topic is subscribed and parsed once. With a portal id the values
+    are read from Venus OS directly. Release it again with
+    async_release_victron_dispatcher.
+    """
+    dispatchers = hass.data.setdefault(DATA_VICTRON_DISPATCHERS, {})
+    portal_id = portal_id or None
+    # Re-adding the Victron entry with another source must not reuse the
+    # dispatcher a controller still holds
+    if (dispatcher := dispatchers.get((topic_prefix, portal_id))) is None:
+        if portal_id:
+            dispatcher = VenusDispatcher(hass, topic_prefix, portal_id, VICTRON_SENSORS)
+        else:
+            dispatcher = GoEChargerDispatcher(hass, topic_prefix)
+        dispatchers[(topic_prefix, portal_id)] = dispatcher
+        await dispatcher.async_subscribe()
+
+    dispatcher.users += 1
+    return dispatcher
+
+
+@callback
+def async_release_victron_dispatcher(
+    hass: HomeAssistant, dispatcher: GoEChargerDispatcher
+) -> None:
+    """Release a Victron dispatcher, unsubscribing once it is unused."""
+    dispatcher.users -= 1
+    if dispatcher.users == 0:
+        dispatchers = hass.data[DATA_VICTRON_DISPATCHERS]
+        key = (dispatcher.base_topic[:-1], dispatcher.portal_id)
+        if dispatchers.get(key) is dispatcher:
+            del dispatchers[key]
+        dispatcher.async_unsubscribe()
@@ -1,46 +1,389 @@
 """MQTT component mixins and helpers."""
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
+import logging
+import math
+import sys
+import time
+
 from homeassistant import config_entries
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.event import async_call_later
 from homeassistant.util import slugify
 
+from .cache import LastValueCache
 from .const import (
-    CONF_SERIAL_NUMBER,
+    CONF_ENTRY_TYPE,
     CONF_GOE_TOPIC_PREFIX,
+    CONF_PORTAL_ID,
+    CONF_SERIAL_NUMBER,
+    CONF_VICTRON_TOPIC_PREFIX,
+    DEFAULT_SET_TIMEOUT,
+    DEFAULT_VICTRON_TOPIC_PREFIX,
     DEVICE_INFO_MANUFACTURER,
     DEVICE_INFO_MODEL,
     DOMAIN,
-    DEFAULT_VICTRON_TOPIC_PREFIX,
+    ENTRY_TYPE_VICTRON,
+    VICTRON_DEVICE_ID,
+    VICTRON_DEVICE_INFO_MANUFACTURER,
+    VICTRON_DEVICE_INFO_MODEL,
 )
 from .definitions import GoEChargerEntityDescription
+from .dispatcher import GoEChargerMessage
+from .profiling import KeyProfile
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def set_result_ok(result: str) -> bool:
+    """Return True if a <key>/result payload confirms the write."""
+    return result.strip().strip('"').lower() in ("ok", "true")
+
+
+def is_victron_entry(config_entry: config_entries.ConfigEntry) -> bool:
+    """Return True if the config entry is the Victron one, not a charger."""
+    return config_entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_VICTRON
+
+
+def victron_source(hass: HomeAssistant) -> tuple[str, str | None]:
+    """Return the topic prefix and Venus OS portal id of the Victron entry."""
+    for config_entry in hass.config_entries.async_entries(DOMAIN):
+        if is_victron_entry(config_entry):
+            return (
+                config_entry.data[CONF_VICTRON_TOPIC_PREFIX],
+                config_entry.data.get(CONF_PORTAL_ID),
+            )
+    return DEFAULT_VICTRON_TOPIC_PREFIX, None
+
+
+def device_id(config_entry: config_entries.ConfigEntry) -> str:
+    """Return the serial number of a charger, or the id of the Victron device."""
+    if is_victron_entry(config_entry):
+        return VICTRON_DEVICE_ID
+    return config_entry.data[CONF_SERIAL_NUMBER]
+
+
+def unique_id(device: str, description: GoEChargerEntityDescription) -> str:
+    """Return the unique id of the entity of a description."""
+    return "-".join(
+        [device, description.domain, description.key, description.attribute]
+    )
+
+
+@lru_cache(maxsize=None)
+def device_info(device: str, title: str) -> DeviceInfo:
+    """Return the device info shared by all entities of a device."""
+    if device == VICTRON_DEVICE_ID:
+        manufacturer, model = (
+            VICTRON_DEVICE_INFO_MANUFACTURER,
+            VICTRON_DEVICE_INFO_MODEL,
+        )
+    else:
+        manufacturer, model = DEVICE_INFO_MANUFACTURER, DEVICE_INFO_MODEL
+
+    return DeviceInfo(
+        identifiers={(DOMAIN, device)},
+        name=title,
+        manufacturer=manufacturer,
+        model=model,
+    )
+
+
+@callback
+def async_enabled_descriptions(
+    hass: HomeAssistant,
+    config_entry: config_entries.ConfigEntry,
+    descriptions: Iterable[GoEChargerEntityDescription],
+) -> Iterator[GoEChargerEntityDescription]:
+    """Return the supported descriptions whose entity is not disabled.
+
+    Entities disabled in the entity registry are neither constructed nor
+    subscribed. Enabling one reloads the config entry, which creates it then.
+    Entities not registered yet are always created, so that they show up in
+    the registry, disabled by default or not.
+    """
+    registry = er.async_get(hass)
+    device = device_id(config_entry)
+
+    for description in descriptions:
+        if description.disabled:
+            continue
+
+        entity_id = registry.async_get_entity_id(
+            description.domain, DOMAIN, unique_id(device, description)
+        )
+        if entity_id is not None and registry.async_get(entity_id).disabled:
+            continue
+
+        yield description
+
+
+@callback
+def async_setup_entities(
+    hass: HomeAssistant,
+    config_entry: config_entries.ConfigEntry,
+    async_add_entities: Callable,
+    entity_class: type,
+    descriptions: Iterable[GoEChargerEntityDescription],
+    discover: bool = True,
+) -> None:
+    """Add the entities of the descriptions.
+
+    With discover, entities of keys the charger did not publish while setting
+    up are only added once the key shows up. Entities already registered are
+    always added, with the value of the last payload known before the
+    restart, if any.
+    """
+    dispatcher = hass.data[DOMAIN][config_entry.entry_id]
+    registry = er.async_get(hass)
+    device = device_id(config_entry)
+    entities = []
+    cached: dict[str, GoEChargerMessage] = {}
+    deferred: dict[str, list[GoEChargerEntityDescription]] = {}
+
+    for description in async_enabled_descriptions(hass, config_entry, descriptions):
+        if (
+            discover
+            and not description.isVictron
+            and "+" not in description.key
+            and not dispatcher.is_published(description.key)
+            and registry.async_get_entity_id(
+                description.domain, DOMAIN, unique_id(device, description)
+            )
+            is None
+        ):
+            deferred.setdefault(description.key, []).append(description)
+            continue
+
+        entity = entity_class(config_entry, description)
+        if dispatcher.last_values is not None:
+            async_seed_cached_value(entity, dispatcher.last_values, cached)
+        entities.append(entity)
+
+    @callback
+    def async_add_key(key: str, message) -> None:
+        """Add the entities of a key published for the first time."""
+        if (new_descriptions := deferred.pop(key, None)) is None:
+            return
+
+        new_entities = []
+        for description in new_descriptions:
+            entity = entity_class(config_entry, description)
+            try:
+                entity.seed_value(message)
+            except (ValueError, KeyError, IndexError, TypeError):
+                # Added without value, the next message of the key sets it
+                _LOGGER.debug(
+                    "Ignoring first payload of %s: %s", message.topic, message.payload
+                )
+            new_entities.append(entity)
+        async_add_entities(new_entities)
+
+    if deferred:
+        config_entry.async_on_unload(dispatcher.async_add_key_listener(async_add_key))
+
+    async_add_entities(entities)
+
+
+@callback
+def async_seed_cached_value(
+    entity: "GoEChargerEntity",
+    last_values: LastValueCache,
+    cached: dict[str, GoEChargerMessage],
+) -> None:
+    """Set the value of an entity from the payload known before the restart.
+
+    cached holds the messages already built, so entities sharing a topic
+    share the decoded payload as well.
+    """
+    topic = entity._topic
+    if (message := cached.get(topic)) is None:
+        if (payload := last_values.payloads.get(topic)) is None:
+            return
+        message = cached[topic] = GoEChargerMessage(topic, payload)
+
+    try:
+        entity.seed_value(message)
+    except (ValueError, KeyError, IndexError, TypeError):
+        _LOGGER.debug("Ignoring cached payload of %s: %s", topic, message.payload)
+
+
+class GoEChargerHelperEntity(Entity):
+    """Entity of a device not bound to a key, e.g. fed by the dispatcher."""
+
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        config_entry: config_entries.ConfigEntry,
+        description: GoEChargerEntityDescription,
+    ) -> None:
+        """Initialize the entity."""
+        device = device_id(config_entry)
+        self.entity_description = description
+        self._entry_id = config_entry.entry_id
+
+        # Named like a key of the device for consistent entity ids
+        if is_victron_entry(config_entry):
+            topic_prefix = config_entry.data[CONF_VICTRON_TOPIC_PREFIX]
+            topic = f"{topic_prefix}/{description.key}"
+        else:
+            topic_prefix = config_entry.data[CONF_GOE_TOPIC_PREFIX]
+            topic = f"{topic_prefix}/{device}/{description.key}"
+        self.entity_id = f"{description.domain}.{slugify(topic.replace('/', '_'))}"
+        self._attr_unique_id = unique_id(device, description)
+        self._attr_device_info = device_info(device, config_entry.title)
 
 
 class GoEChargerEntity(Entity):
     """Common go-eCharger entity."""
 
+    __slots__ = (
+        "_entry_id",
+        "_topic",
+        "_last_write",
+        "_pending_value",
+        "_cancel_pending_write",
+        "_profile",
+    )
+
+    # Name of the attribute holding the value received via MQTT
+    _value_attr: str
+
     def __init__(
         self,
         config_entry: config_entries.ConfigEntry,
         description: GoEChargerEntityDescription,
     ) -> None:
         """Initialize the sensor."""
-        serial_number = config_entry.data[CONF_SERIAL_NUMBER]
+        device = device_id(config_entry)
+        self._entry_id = config_entry.entry_id
+        self._last_write = -math.inf
+        self._pending_value = None
+        self._cancel_pending_write: CALLBACK_TYPE | None = None
+        # Counters of the key while the dispatcher is profiled
+        self._profile: KeyProfile | None = None
 
-        if description.isVictron:            
-            topic_prefix = DEFAULT_VICTRON_TOPIC_PREFIX
-            self._topic = f"{topic_prefix}/{description.key}"
+        # Entities sharing a topic (e.g. the nrg ones) share the string as well
+        if description.isVictron:
+            topic_prefix = config_entry.data[CONF_VICTRON_TOPIC_PREFIX]
+            self._topic = sys.intern(f"{topic_prefix}/{description.key}")
         else:
             topic_prefix = config_entry.data[CONF_GOE_TOPIC_PREFIX]
-            self._topic = f"{topic_prefix}/{serial_number}/{description.key}"
+            self._topic = sys.intern(f"{topic_prefix}/{device}/{description.key}")
 
         slug = slugify(self._topic.replace("/", "_"))
         self.entity_id = f"{description.domain}.{slug}"
 
-        self._attr_unique_id = "-".join(
-            [serial_number, description.domain, description.key, description.attribute]
-        )
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, serial_number)},
-            name=config_entry.title,
-            manufacturer=DEVICE_INFO_MANUFACTURER,
-            model=DEVICE_INFO_MODEL,
-        )
+        self._attr_unique_id = unique_id(device, description)
+        self._attr_device_info = device_info(device, config_entry.title)
+
+    def seed_value(self, message) -> None:
+        """Set the value from a message received before the entity was added."""
+        setattr(self, self._value_attr, self.entity_description.decoder(message))
+
+    def value_changed(self, value) -> bool:
+        """Return True if value differs from the last written one."""
+        current = getattr(self, self._value_attr)
+        if value == current:
+            return False
+
+        deadband = self.entity_description.deadband
+        if deadband is not None:
+            # Descriptions without state callable keep the payload string
+            try:
+                return abs(float(value) - float(current)) >= deadband
+            except (TypeError, ValueError):
+                pass
+
+        return True
+
+    @callback
+    def async_update_value(self, value, force: bool = False) -> None:
+        """Store a received value and write the state if it changed.
+
+        Unchanged values are dropped unless max_update_interval of the
+        description has expired since the last write. Values arriving within
+        min_update_interval of the last write are coalesced, only the latest
+        one is written once the window has passed.
+        """
+        if self._cancel_pending_write is not None and not force:
+            self._pending_value = value
+            return
+
+        now = time.monotonic()
+        since_last_write = now - self._last_write
+        if (
+            not force
+            and not self.value_changed(value)
+            and since_last_write < self.entity_description.max_update_interval
+        ):
+            return
+
+        min_interval = self.entity_description.min_update_interval
+        if not force and min_interval is not None and since_last_write < min_interval:
+            self._pending_value = value
+            self._cancel_pending_write = async_call_later(
+                self.hass, min_interval - since_last_write, self._async_write_pending
+            )
+            return
+
+        self._async_cancel_pending_write()
+        self._async_write_value(value, now)
+
+    @callback
+    def _async_write_value(self, value, now: float) -> None:
+        """Set the value and write the state."""
+        setattr(self, self._value_attr, value)
+        self._last_write = now
+        if self._profile is not None:
+            self._profile.state_writes += 1
+        self.async_write_ha_state()
+
+    @callback
+    def _async_write_pending(self, _now) -> None:
+        """Write the latest value coalesced during min_update_interval."""
+        self._cancel_pending_write = None
+        value = self._pending_value
+        self._pending_value = None
+        if self.value_changed(value):
+            self._async_write_value(value, time.monotonic())
+
+    @callback
+    def _async_cancel_pending_write(self) -> None:
+        """Drop a scheduled coalesced write."""
+        if self._cancel_pending_write is not None:
+            self._cancel_pending_write()
+            self._cancel_pending_write = None
+            self._pending_value = None
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel pending writes when the entity is removed."""
+        self._async_cancel_pending_write()
+
+    async def async_publish_value(self, value) -> None:
+        """Set the key of the entity and wait for the charger to confirm it.
+
+        Raises HomeAssistantError if the charger reports an error or does not
+        answer within DEFAULT_SET_TIMEOUT seconds.
+        """
+        key = self.entity_description.key
+        dispatcher = self.hass.data[DOMAIN][self._entry_id]
+        result = await dispatcher.async_set_config_key(key, value, DEFAULT_SET_TIMEOUT)
+        if result is None:
+            raise HomeAssistantError(
+                f"go-eCharger did not confirm setting {key} within"
+                f" {DEFAULT_SET_TIMEOUT} seconds"
+            )
+        if not set_result_ok(result):
+            raise HomeAssistantError(f"go-eCharger failed to set {key}: {result}")
+
+    async def async_subscribe_topic(self, msg_callback: Callable) -> None:
+        """Receive the messages of the entity topic via the shared dispatcher."""
+        dispatcher = self.hass.data[DOMAIN][self._entry_id]
+        if dispatcher.profiler is not None:
+            self._profile = dispatcher.profiler.key(dispatcher.profile_key(self._topic))
+        self.async_on_remove(await dispatcher.async_register(self._topic, msg_callback))
@@ -0,0 +1,159 @@
+"""Decoded nrg array of a go-eCharger."""
+from __future__ import annotations
+
+from array import array
+
+
+class NrgSnapshot:
+    """The 16 values of an nrg message, converted to float once.
+
+    Order of the array: voltages U1, U2, U3, UN in V, currents I1, I2, I3 in
+    A, powers P1, P2, P3, PN, Ptotal in W and power factors pf1, pf2, pf3, pfN
+    in %. Every entity of the nrg topic reads its value from the snapshot of
+    the message instead of converting the JSON itself.
+    """
+
+    __slots__ = ("_values",)
+
+    # Accessor names by index in the nrg array
+    FIELDS = (
+        "u1",
+        "u2",
+        "u3",
+        "un",
+        "i1",
+        "i2",
+        "i3",
+        "p1",
+        "p2",
+        "p3",
+        "pn",
+        "ptotal",
+        "pf1",
+        "pf2",
+        "pf3",
+        "pfn",
+    )
+
+    def __init__(self, values: array) -> None:
+        """Initialize the snapshot from an array of 16 doubles."""
+        self._values = values
+
+    @classmethod
+    def from_json(cls, data) -> NrgSnapshot | None:
+        """Return the snapshot of a decoded nrg payload, None if it is invalid."""
+        if not isinstance(data, list) or len(data) < len(cls.FIELDS):
+            return None
+        try:
+            return cls(array("d", data[: len(cls.FIELDS)]))
+        except TypeError:
+            return None
+
+    def __getitem__(self, index: int) -> float:
+        """Return the value at index of the nrg array."""
+        return self._values[index]
+
+    @property
+    def u1(self) -> float:
+        """Return the voltage of L1."""
+        return self._values[0]
+
+    @property
+    def u2(self) -> float:
+        """Return the voltage of L2."""
+        return self._values[1]
+
+    @property
+    def u3(self) -> float:
+        """Return the voltage of L3."""
+        return self._values[2]
+
+    @property
+    def un(self) -> float:
+        """Return the voltage of N."""
+        return self._values[3]
+
+    @property
+    def i1(self) -> float:
+        """Return the current of L1."""
+        return self._values[4]
+
+    @property
+    def i2(self) -> float:
+        """Return the current of L2."""
+        return self._values[5]
+
+    @property
+    def i3(self) -> float:
+        """Return the current of L3."""
+        return self._values[6]
+
+    @property
+    def p1(self) -> float:
+        """Return the power of L1."""
+        return self._values[7]
+
+    @property
+    def p2(self) -> float:
+        """Return the power of L2."""
+        return self._values[8]
+
+    @property
+    def p3(self) -> float:
+        """Return the power of L3."""
+        return self._values[9]
+
+    @property
+    def pn(self) -> float:
+        """Return the power of N."""
+        return self._values[10]
+
+    @property
+    def ptotal(self) -> float:
+        """Return the total power."""
+        return self._values[11]
+
+    @property
+    def pf1(self) -> float:
+        """Return the power factor of L1."""
+        return self._values[12]
+
+    @property
+    def pf2(self) -> float:
+        """Return the power factor of L2."""
+        return self._values[13]
+
+    @property
+    def pf3(self) -> float:
+        """Return the power factor of L3."""
+        return self._values[14]
+
+    @property
+    def pfn(self) -> float:
+        """Return the power factor of N."""
+        return self._values[15]
+
+    @property
+    def pf(self) -> tuple[float, float, float, float]:
+        """Return the power factors of L1, L2, L3 and N."""
+        return tuple(self._values[12:16])
+
+    @property
+    def s1(self) -> float:
+        """Return the apparent power of L1 in VA."""
+        return round(self._values[0] * self._values[4], 1)
+
+    @property
+    def s2(self) -> float:
+        """Return the apparent power of L2 in VA."""
+        return round(self._values[1] * self._values[5], 1)
+
+    @property
+    def s3(self) -> float:
+        """Return the apparent power of L3 in VA."""
+        return round(self._values[2] * self._values[6], 1)
+
+    @property
+    def stotal(self) -> float:
+        """Return the apparent power of all phases in VA."""
+        return round(self.s1 + self.s2 + self.s3, 1)
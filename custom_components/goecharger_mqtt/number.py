@@ -2,12 +2,11 @@
 import logging
 
 from homeassistant import config_entries, core
-from homeassistant.components import mqtt
 from homeassistant.components.number import NumberEntity
 from homeassistant.core import callback
 
 from .definitions.number import NUMBERS, GoEChargerNumberEntityDescription
-from .entity import GoEChargerEntity
+from .entity import GoEChargerEntity, async_setup_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,10 +17,8 @@ async def async_setup_entry(
     async_add_entities,
 ):
     """Config entry setup."""
-    async_add_entities(
-        GoEChargerNumber(config_entry, description)
-        for description in NUMBERS
-        if not description.disabled
+    async_setup_entities(
+        hass, config_entry, async_add_entities, GoEChargerNumber, NUMBERS
     )
 
 
@@ -29,6 +26,7 @@ class GoEChargerNumber(GoEChargerEntity, NumberEntity):
     """Representation of a go-eCharger switch that is updated via MQTT."""
 
     entity_description: GoEChargerNumberEntityDescription
+    _value_attr = "_attr_native_value"
 
     def __init__(
         self,
@@ -41,27 +39,24 @@ class GoEChargerNumber(GoEChargerEntity, NumberEntity):
         self.entity_description = description
         self._attr_available = False
 
+    def seed_value(self, message) -> None:
+        """Set the value from a message received before the entity was added."""
+        super().seed_value(message)
+        self._attr_available = True
+
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
-        await mqtt.async_publish(self.hass, f"{self._topic}/set", int(value))
+        await self.async_publish_value(int(value))
 
     async def async_added_to_hass(self):
         """Subscribe to MQTT events."""
+        decoder = self.entity_description.decoder
 
         @callback
         def message_received(message):
             """Handle new MQTT messages."""
+            became_available = not self._attr_available
             self._attr_available = True
-            if self.entity_description.state is not None:
-                self._attr_native_value = self.entity_description.state(
-                    message.payload, self.entity_description.attribute
-                )
-            else:
-                if message.payload == "null":
-                    self._attr_native_value = None
-                else:
-                    self._attr_native_value = message.payload
-
-            self.async_write_ha_state()
+            self.async_update_value(decoder(message), force=became_available)
 
-        await mqtt.async_subscribe(self.hass, self._topic, message_received, 1)
+        await self.async_subscribe_topic(message_received)
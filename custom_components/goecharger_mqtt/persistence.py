@@ -0,0 +1,103 @@
+"""Persisted state of a config entry."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import math
+import time
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STATE_WRITE_DELAY, STATE_WRITE_INTERVAL, STORAGE_VERSION
+
+
+class EntryStateWriter:
+    """Single writer of all persisted state of a config entry.
+
+    Components register a section with a function returning a snapshot of
+    their data and mark it dirty when it changed. Dirty sections are
+    collected for STATE_WRITE_DELAY seconds and written together, at most
+    once per STATE_WRITE_INTERVAL seconds. Store writes the file from the
+    executor to a temporary file renamed over the old one, so a crash never
+    leaves a truncated file behind. Pending changes are written when the
+    entry is unloaded or Home Assistant stops.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the writer."""
+        self.hass = hass
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._sections: dict[str, Callable[[], Any]] = {}
+        # Last written or loaded data of every section
+        self._data: dict[str, Any] = {}
+        self._dirty: set[str] = set()
+        self._last_write = -math.inf
+        self._cancel_write: CALLBACK_TYPE | None = None
+
+    async def async_load(self) -> None:
+        """Load the state stored before the restart."""
+        self._data = await self._store.async_load() or {}
+
+    def section(self, name: str) -> Any:
+        """Return the loaded data of a section, None if there is none."""
+        return self._data.get(name)
+
+    @callback
+    def async_register(self, name: str, snapshot: Callable[[], Any]) -> None:
+        """Register a section, snapshot returns the data to write.
+
+        The snapshot is taken on the event loop, the executor serializes it
+        while the component keeps changing its data.
+        """
+        self._sections[name] = snapshot
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Write pending changes when Home Assistant stops."""
+
+        async def async_final_write(_event) -> None:
+            await self.async_flush()
+
+        return self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_FINAL_WRITE, async_final_write
+        )
+
+    @callback
+    def async_mark_dirty(self, name: str) -> None:
+        """Schedule writing a changed section."""
+        self._dirty.add(name)
+        if self._cancel_write is not None:
+            return
+
+        delay = max(
+            STATE_WRITE_DELAY,
+            self._last_write + STATE_WRITE_INTERVAL - time.monotonic(),
+        )
+        self._cancel_write = async_call_later(self.hass, delay, self._async_write_later)
+
+    @callback
+    def _async_write_later(self, _now) -> None:
+        """Write the dirty sections once the delay passed."""
+        self._cancel_write = None
+        self.hass.async_create_task(self.async_flush())
+
+    async def async_flush(self) -> None:
+        """Write the dirty sections now."""
+        if self._cancel_write is not None:
+            self._cancel_write()
+            self._cancel_write = None
+        if not self._dirty:
+            return
+
+        for name in self._dirty:
+            self._data[name] = self._sections[name]()
+        self._dirty.clear()
+        self._last_write = time.monotonic()
+        await self._store.async_save(dict(self._data))
+
+    async def async_remove(self) -> None:
+        """Delete the stored state."""
+        await self._store.async_remove()
@@ -0,0 +1,61 @@
+"""Opt-in counters of the message handling per key."""
+from __future__ import annotations
+
+
+class KeyProfile:
+    """Counters of the messages of one key."""
+
+    __slots__ = (
+        "messages",
+        "callback_seconds",
+        "decodes",
+        "decode_seconds",
+        "state_writes",
+        "exceptions",
+    )
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.messages = 0
+        # Time spent in the callbacks of the entities, including decoding
+        self.callback_seconds = 0.0
+        self.decodes = 0
+        self.decode_seconds = 0.0
+        self.state_writes = 0
+        self.exceptions = 0
+
+    def as_dict(self) -> dict:
+        """Return the counters, times in milliseconds."""
+        return {
+            "messages": self.messages,
+            "callback_ms": round(self.callback_seconds * 1000, 3),
+            "decodes": self.decodes,
+            "decode_ms": round(self.decode_seconds * 1000, 3),
+            "state_writes": self.state_writes,
+            "exceptions": self.exceptions,
+        }
+
+
+class DispatchProfiler:
+    """Counters of a dispatcher by key, e.g. nrg or amp/result."""
+
+    def __init__(self) -> None:
+        """Initialize the profiler."""
+        self.keys: dict[str, KeyProfile] = {}
+
+    def key(self, key: str) -> KeyProfile:
+        """Return the counters of a key, creating them on first use."""
+        if (profile := self.keys.get(key)) is None:
+            profile = self.keys[key] = KeyProfile()
+        return profile
+
+    def hottest(self, count: int | None = None) -> list[tuple[str, KeyProfile]]:
+        """Return the keys sorted by the time spent in their callbacks."""
+        ranked = sorted(
+            self.keys.items(), key=lambda item: item[1].callback_seconds, reverse=True
+        )
+        return ranked if count is None else ranked[:count]
+
+    def as_dict(self) -> dict:
+        """Return the counters of all keys, the most expensive first."""
+        return {key: profile.as_dict() for key, profile in self.hottest()}
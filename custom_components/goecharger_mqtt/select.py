@@ -2,12 +2,11 @@
 import logging
 
 from homeassistant import config_entries, core
-from homeassistant.components import mqtt
 from homeassistant.components.select import SelectEntity
 from homeassistant.core import callback
 
 from .definitions.select import SELECTS, GoEChargerSelectEntityDescription
-from .entity import GoEChargerEntity
+from .entity import GoEChargerEntity, async_setup_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,10 +17,8 @@ async def async_setup_entry(
     async_add_entities,
 ):
     """Config entry setup."""
-    async_add_entities(
-        GoEChargerSelect(config_entry, description)
-        for description in SELECTS
-        if not description.disabled
+    async_setup_entities(
+        hass, config_entry, async_add_entities, GoEChargerSelect, SELECTS
     )
 
 
@@ -29,6 +26,7 @@ class GoEChargerSelect(GoEChargerEntity, SelectEntity):
     """Representation of a go-eCharger switch that is updated via MQTT."""
 
     entity_description: GoEChargerSelectEntityDescription
+    _value_attr = "_attr_current_option"
 
     def __init__(
         self,
@@ -39,7 +37,7 @@ class GoEChargerSelect(GoEChargerEntity, SelectEntity):
         super().__init__(config_entry, description)
 
         self.entity_description = description
-        self._attr_options = list(description.legacy_options.values())
+        self._attr_options = description.option_names
         self._attr_current_option = None
 
     @property
@@ -47,51 +45,39 @@ class GoEChargerSelect(GoEChargerEntity, SelectEntity):
         """Return True if entity is available."""
         return self._attr_current_option is not None
 
-    def key_from_option(self, option: str):
-        """Return the option a given payload is assigned to."""
+    def seed_value(self, message) -> None:
+        """Set the value from a message received before the entity was added."""
         try:
-            return next(
-                key
-                for key, value in self.entity_description.legacy_options.items()
-                if value == option
-            )
-        except StopIteration:
-            return None
+            super().seed_value(message)
+        except KeyError:
+            pass
+
+    def key_from_option(self, option: str):
+        """Return the payload a given option is assigned to."""
+        return self.entity_description.payload_by_option.get(option)
 
     async def async_select_option(self, option: str) -> None:
         """Update the current value."""
-        await mqtt.async_publish(
-            self.hass, f"{self._topic}/set", self.key_from_option(option)
-        )
+        await self.async_publish_value(self.key_from_option(option))
 
     async def async_added_to_hass(self):
         """Subscribe to MQTT events."""
+        decoder = self.entity_description.decoder
 
         @callback
         def message_received(message):
             """Handle new MQTT messages."""
-            if self.entity_description.state is not None:
-                self._attr_current_option = self.entity_description.state(
-                    message.payload, self.entity_description.attribute
+            try:
+                value = decoder(message)
+            except KeyError:
+                _LOGGER.error(
+                    "Invalid option for %s: '%s' (valid options: %s)",
+                    self.entity_id,
+                    message.payload,
+                    self.options,
                 )
-            else:
-                payload = message.payload
-                # if payload is None or payload in ["null", "none"]:
-                #     return
-
-                if payload not in self.entity_description.legacy_options.keys():
-                    _LOGGER.error(
-                        "Invalid option for %s: '%s' (valid options: %s)",
-                        self.entity_id,
-                        payload,
-                        self.options,
-                    )
-                    return
-
-                self._attr_current_option = self.entity_description.legacy_options[
-                    payload
-                ]
-
-            self.async_write_ha_state()
-
-        await mqtt.async_subscribe(self.hass, self._topic, message_received, 1)
+                return
+
+            self.async_update_value(value)
+
+        await self.async_subscribe_topic(message_received)
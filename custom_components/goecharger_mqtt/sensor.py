@@ -1,13 +1,40 @@
 """The go-eCharger (MQTT) sensor."""
+from datetime import timedelta
 import logging
+import math
+import time
 
 from homeassistant import config_entries, core
-from homeassistant.components import mqtt
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.util import slugify
 
-from .definitions.sensor import GOE_SENSORS, VICTRON_SENSORS, GoEChargerSensorEntityDescription
-from .entity import GoEChargerEntity
+from .const import (
+    CONF_STATISTICS_WINDOWS,
+    DEFAULT_STATISTICS_WINDOWS,
+    DOMAIN,
+    PROFILING_TOP_KEYS,
+    PROFILING_UPDATE_INTERVAL,
+    STATISTICS_SAMPLE_RATE,
+)
+from .definitions.sensor import (
+    GOE_SENSORS,
+    PROFILING_SENSOR,
+    VICTRON_SENSORS,
+    WRITE_LATENCY_SENSOR,
+    GoEChargerSensorEntityDescription,
+    GoEChargerStatisticSensorEntityDescription,
+    statistic_descriptions,
+)
+from .entity import (
+    GoEChargerEntity,
+    GoEChargerHelperEntity,
+    async_enabled_descriptions,
+    async_setup_entities,
+    is_victron_entry,
+)
+from .statistics import STATISTICS, RollingWindow
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -51,10 +78,51 @@ async def async_setup_entry(
     #         f"| `{description.key}` | {description.name} | {entity_category} | {native_unit_of_measurement} | {entity_registry_enabled} | {supported} | {reason} |"
     #     )
 
+    windows = tuple(
+        config_entry.options.get(CONF_STATISTICS_WINDOWS, DEFAULT_STATISTICS_WINDOWS)
+    )
+    if hass.data[DOMAIN][config_entry.entry_id].profiler is not None:
+        async_add_entities(
+            GoEChargerProfilingSensor(config_entry, description)
+            for description in async_enabled_descriptions(
+                hass, config_entry, (PROFILING_SENSOR,)
+            )
+        )
+
+    if is_victron_entry(config_entry):
+        async_setup_entities(
+            hass,
+            config_entry,
+            async_add_entities,
+            GoEChargerSensor,
+            VICTRON_SENSORS,
+            discover=False,
+        )
+        async_setup_entities(
+            hass,
+            config_entry,
+            async_add_entities,
+            GoEChargerStatisticSensor,
+            statistic_descriptions(True, windows),
+            discover=False,
+        )
+        return
+
+    async_setup_entities(
+        hass, config_entry, async_add_entities, GoEChargerSensor, GOE_SENSORS
+    )
+    async_setup_entities(
+        hass,
+        config_entry,
+        async_add_entities,
+        GoEChargerStatisticSensor,
+        statistic_descriptions(False, windows),
+    )
     async_add_entities(
-        GoEChargerSensor(config_entry, description)
-        for description in GOE_SENSORS+VICTRON_SENSORS
-        if not description.disabled
+        GoEChargerWriteLatencySensor(config_entry, description)
+        for description in async_enabled_descriptions(
+            hass, config_entry, (WRITE_LATENCY_SENSOR,)
+        )
     )
 
 
@@ -62,6 +130,7 @@ class GoEChargerSensor(GoEChargerEntity, SensorEntity):
     """Representation of a go-eCharger sensor that is updated via MQTT."""
 
     entity_description: GoEChargerSensorEntityDescription
+    _value_attr = "_attr_native_value"
 
     def __init__(
         self,
@@ -80,20 +149,149 @@ class GoEChargerSensor(GoEChargerEntity, SensorEntity):
 
     async def async_added_to_hass(self):
         """Subscribe to MQTT events."""
+        decoder = self.entity_description.decoder
 
         @callback
         def message_received(message):
             """Handle new MQTT messages."""
-            if self.entity_description.state is not None:
-                self._attr_native_value = self.entity_description.state(
-                    message.payload, self.entity_description.attribute
+            self.async_update_value(decoder(message))
+
+        await self.async_subscribe_topic(message_received)
+
+
+class GoEChargerStatisticSensor(GoEChargerSensor):
+    """Rolling statistic of a power channel.
+
+    The samples are only buffered in memory, the recorder just sees the
+    state, which is written at most every tenth of the window.
+    """
+
+    __slots__ = ("_samples", "_last_computed")
+
+    entity_description: GoEChargerStatisticSensorEntityDescription
+
+    def __init__(
+        self,
+        config_entry: config_entries.ConfigEntry,
+        description: GoEChargerStatisticSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(config_entry, description)
+
+        self.entity_id = f"{self.entity_id}_{slugify(description.attribute)}"
+        self._samples = RollingWindow(
+            description.window, math.ceil(description.window * STATISTICS_SAMPLE_RATE)
+        )
+        # Unchanged statistics are not written, so the last write cannot pace
+        # the computations
+        self._last_computed = -math.inf
+
+    def seed_value(self, message) -> None:
+        """Ignore the first message, the dispatcher replays it when subscribing."""
+
+    async def async_added_to_hass(self):
+        """Subscribe to MQTT events."""
+        decoder = self.entity_description.decoder
+        samples = self._samples
+
+        @callback
+        def message_received(message):
+            """Add the sample, the statistic is computed once a write is due."""
+            if (sample := decoder(message)) is None:
+                return
+            now = time.monotonic()
+            samples.add(now, sample)
+            if self._cancel_pending_write is None:
+                delay = max(
+                    0.0,
+                    self._last_computed
+                    + (self.entity_description.min_update_interval or 0)
+                    - now,
+                )
+                self._cancel_pending_write = async_call_later(
+                    self.hass, delay, self._async_write_statistic
                 )
-            else:
-                if message.payload == "null":
-                    self._attr_native_value = None
-                else:
-                    self._attr_native_value = message.payload
 
+        await self.async_subscribe_topic(message_received)
+
+    @callback
+    def _async_write_statistic(self, _now) -> None:
+        """Compute the statistic of the buffered samples and write it."""
+        self._cancel_pending_write = None
+        self._last_computed = time.monotonic()
+        statistic = STATISTICS[self.entity_description.statistic]
+        self.async_update_value(round(statistic(self._samples), 1))
+
+
+class GoEChargerWriteLatencySensor(GoEChargerHelperEntity, SensorEntity):
+    """Round-trip latency of the config writes of a go-eCharger.
+
+    The state is the latency of the last confirmed write, the attributes hold
+    the histogram of all writes since the config entry was set up.
+    """
+
+    entity_description: GoEChargerSensorEntityDescription
+
+    @property
+    def _histogram(self):
+        return self.hass.data[DOMAIN][self._entry_id].write_latency
+
+    @property
+    def native_value(self):
+        """Return the latency of the last confirmed write in milliseconds."""
+        if (latency := self._histogram.last) is None:
+            return None
+        return round(latency * 1000, 1)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the latency histogram."""
+        return self._histogram.as_dict()
+
+    async def async_added_to_hass(self):
+        """Update the state whenever a write was recorded."""
+        self.async_on_remove(
+            self._histogram.async_add_listener(self.async_write_ha_state)
+        )
+
+
+class GoEChargerProfilingSensor(GoEChargerHelperEntity, SensorEntity):
+    """Key whose messages took the most time since the entry was set up.
+
+    The attributes hold the counters of the most expensive keys. The state is
+    written periodically, not for every message.
+    """
+
+    entity_description: GoEChargerSensorEntityDescription
+
+    @property
+    def _profiler(self):
+        return self.hass.data[DOMAIN][self._entry_id].profiler
+
+    @property
+    def native_value(self):
+        """Return the key with the most time spent in its callbacks."""
+        if not (hottest := self._profiler.hottest(1)):
+            return None
+        return hottest[0][0]
+
+    @property
+    def extra_state_attributes(self):
+        """Return the counters of the most expensive keys."""
+        return {
+            key: profile.as_dict()
+            for key, profile in self._profiler.hottest(PROFILING_TOP_KEYS)
+        }
+
+    async def async_added_to_hass(self):
+        """Update the state periodically."""
+
+        @callback
+        def async_update(_now) -> None:
             self.async_write_ha_state()
 
-        await mqtt.async_subscribe(self.hass, self._topic, message_received, 1)
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, async_update, timedelta(seconds=PROFILING_UPDATE_INTERVAL)
+            )
+        )
@@ -0,0 +1,130 @@
+"""Rolling statistics of the power channels, kept in memory only."""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from collections.abc import Callable
+
+
+class RollingWindow:
+    """Samples of the last window seconds in fixed-size ring buffers.
+
+    Adding a sample is O(1) amortized: the sum for the mean is updated
+    incrementally and minimum and maximum are tracked with monotonic queues
+    of sample numbers. Percentiles sort a copy of the samples when read.
+    Once capacity samples are buffered the oldest one is dropped, even if it
+    is still within the window.
+    """
+
+    __slots__ = (
+        "window",
+        "capacity",
+        "_times",
+        "_values",
+        "_first",
+        "_next",
+        "_sum",
+        "_min",
+        "_max",
+    )
+
+    def __init__(self, window: float, capacity: int) -> None:
+        """Initialize the buffers."""
+        self.window = window
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Sample numbers of the oldest buffered and of the next sample, the
+        # slot of sample n is n % capacity
+        self._first = 0
+        self._next = 0
+        self._sum = 0.0
+        self._min: deque[int] = deque()
+        self._max: deque[int] = deque()
+
+    def __len__(self) -> int:
+        """Return the number of buffered samples."""
+        return self._next - self._first
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a sample and drop the ones that left the window."""
+        self.expire(timestamp)
+        if self._next - self._first == self.capacity:
+            self._drop_oldest()
+
+        values = self._values
+        capacity = self.capacity
+        number = self._next
+        self._times[number % capacity] = timestamp
+        values[number % capacity] = value
+        self._sum += value
+
+        while self._min and values[self._min[-1] % capacity] >= value:
+            self._min.pop()
+        self._min.append(number)
+        while self._max and values[self._max[-1] % capacity] <= value:
+            self._max.pop()
+        self._max.append(number)
+
+        self._next = number + 1
+
+    def expire(self, timestamp: float) -> None:
+        """Drop the samples older than window seconds before timestamp."""
+        oldest = timestamp - self.window
+        times = self._times
+        while self._first < self._next and times[self._first % self.capacity] < oldest:
+            self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        """Remove the oldest sample."""
+        number = self._first
+        self._first = number + 1
+        if self._first == self._next:
+            # Reset instead of subtracting to not accumulate rounding errors
+            self._sum = 0.0
+        else:
+            self._sum -= self._values[number % self.capacity]
+        if self._min[0] == number:
+            self._min.popleft()
+        if self._max[0] == number:
+            self._max.popleft()
+
+    def mean(self) -> float | None:
+        """Return the mean of the samples."""
+        if (count := len(self)) == 0:
+            return None
+        return self._sum / count
+
+    def min(self) -> float | None:
+        """Return the smallest sample."""
+        if not self._min:
+            return None
+        return self._values[self._min[0] % self.capacity]
+
+    def max(self) -> float | None:
+        """Return the largest sample."""
+        if not self._max:
+            return None
+        return self._values[self._max[0] % self.capacity]
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the nearest-rank percentile of the samples."""
+        if (count := len(self)) == 0:
+            return None
+        first = self._first % self.capacity
+        end = first + count
+        if end <= self.capacity:
+            ordered = sorted(self._values[first:end])
+        else:
+            ordered = sorted(self._values[first:] + self._values[: end - self.capacity])
+        index = min(count - 1, max(0, round(fraction * count) - 1))
+        return ordered[index]
+
+
+# Statistics exposed as sensors, by the suffix of their key
+STATISTICS: dict[str, Callable[[RollingWindow], float | None]] = {
+    "mean": RollingWindow.mean,
+    "min": RollingWindow.min,
+    "max": RollingWindow.max,
+    "p95": lambda samples: samples.percentile(0.95),
+}
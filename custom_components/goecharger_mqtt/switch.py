@@ -2,12 +2,30 @@
 import logging
 
 from homeassistant import config_entries, core
-from homeassistant.components import mqtt
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.const import STATE_ON
 from homeassistant.core import callback
-
-from .definitions.switch import SWITCHES, GoEChargerSwitchEntityDescription
-from .entity import GoEChargerEntity
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.restore_state import RestoreEntity
+
+from .const import CONF_CONTROLLER_TICK, DEFAULT_CONTROLLER_TICK, DOMAIN
+from .controller import SurplusController
+from .definitions.switch import (
+    SURPLUS_CONTROL_SWITCH,
+    SWITCHES,
+    GoEChargerSwitchEntityDescription,
+)
+from .dispatcher import (
+    async_acquire_victron_dispatcher,
+    async_release_victron_dispatcher,
+)
+from .entity import (
+    GoEChargerEntity,
+    GoEChargerHelperEntity,
+    async_enabled_descriptions,
+    async_setup_entities,
+    victron_source,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,10 +36,14 @@ async def async_setup_entry(
     async_add_entities,
 ):
     """Config entry setup."""
+    async_setup_entities(
+        hass, config_entry, async_add_entities, GoEChargerSwitch, SWITCHES
+    )
     async_add_entities(
-        GoEChargerSwitch(config_entry, description)
-        for description in SWITCHES
-        if not description.disabled
+        GoEChargerSurplusControlSwitch(config_entry, description)
+        for description in async_enabled_descriptions(
+            hass, config_entry, (SURPLUS_CONTROL_SWITCH,)
+        )
     )
 
 
@@ -29,6 +51,7 @@ class GoEChargerSwitch(GoEChargerEntity, SwitchEntity):
     """Representation of a go-eCharger switch that is updated via MQTT."""
 
     entity_description: GoEChargerSwitchEntityDescription
+    _value_attr = "_attr_is_on"
 
     def __init__(
         self,
@@ -56,42 +79,103 @@ class GoEChargerSwitch(GoEChargerEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
-        await mqtt.async_publish(
-            self.hass, f"{self._topic}/set", self.entity_description.payload_on
-        )
-        if self._optimistic:
-            # Optimistically assume that switch has changed state.
-            self._attr_is_on = True
-            self.async_write_ha_state()
+        await self._async_switch(True, self.entity_description.payload_on)
 
     async def async_turn_off(self, **kwargs):
         """Turn the switch off."""
-        await mqtt.async_publish(
-            self.hass, f"{self._topic}/set", self.entity_description.payload_off
-        )
-        if self._optimistic:
-            # Optimistically assume that switch has changed state.
-            self._attr_is_on = False
-            self.async_write_ha_state()
+        await self._async_switch(False, self.entity_description.payload_off)
+
+    async def _async_switch(self, is_on: bool, payload) -> None:
+        """Publish the payload, optimistically assuming the new state.
+
+        The previous state is restored if the charger rejects the write or
+        does not confirm it.
+        """
+        if not self._optimistic:
+            await self.async_publish_value(payload)
+            return
+
+        previous = self._attr_is_on
+        self._attr_is_on = is_on
+        self.async_write_ha_state()
+        try:
+            await self.async_publish_value(payload)
+        except HomeAssistantError:
+            # Unless a message of the key set the state meanwhile
+            if self._attr_is_on is is_on:
+                self._attr_is_on = previous
+                self.async_write_ha_state()
+            raise
 
     async def async_added_to_hass(self):
         """Subscribe to MQTT events."""
+        decoder = self.entity_description.decoder
 
         @callback
         def message_received(message):
             """Handle new MQTT messages."""
-            if self.entity_description.state is not None:
-                self._attr_is_on = self.entity_description.state(
-                    message.payload, self.entity_description.attribute
-                )
-            else:
-                if message.payload == self.entity_description.payload_on:
-                    self._attr_is_on = True
-                elif message.payload == self.entity_description.payload_off:
-                    self._attr_is_on = False
-                else:
-                    self._attr_is_on = None
-
-            self.async_write_ha_state()
-
-        await mqtt.async_subscribe(self.hass, self._topic, message_received, 1)
+            self.async_update_value(decoder(message))
+
+        await self.async_subscribe_topic(message_received)
+
+
+class GoEChargerSurplusControlSwitch(
+    GoEChargerHelperEntity, SwitchEntity, RestoreEntity
+):
+    """Switch running the PV surplus controller of a go-eCharger."""
+
+    entity_description: GoEChargerSwitchEntityDescription
+    _attr_is_on = False
+
+    def __init__(
+        self,
+        config_entry: config_entries.ConfigEntry,
+        description: GoEChargerSwitchEntityDescription,
+    ) -> None:
+        """Initialize the switch."""
+        super().__init__(config_entry, description)
+
+        self._tick = config_entry.options.get(
+            CONF_CONTROLLER_TICK, DEFAULT_CONTROLLER_TICK
+        )
+        self._controller: SurplusController | None = None
+
+    async def async_turn_on(self, **kwargs):
+        """Start the controller."""
+        if self._controller is None:
+            victron_dispatcher = await async_acquire_victron_dispatcher(
+                self.hass, *victron_source(self.hass)
+            )
+            self._controller = SurplusController(
+                self.hass,
+                self.hass.data[DOMAIN][self._entry_id],
+                victron_dispatcher,
+                self._tick,
+            )
+            await self._controller.async_start()
+        self._attr_is_on = True
+        self.async_write_ha_state()
+
+    async def async_turn_off(self, **kwargs):
+        """Stop the controller."""
+        self._async_stop_controller()
+        self._attr_is_on = False
+        self.async_write_ha_state()
+
+    @callback
+    def _async_stop_controller(self) -> None:
+        if self._controller is not None:
+            self._controller.async_stop()
+            async_release_victron_dispatcher(
+                self.hass, self._controller.victron_dispatcher
+            )
+            self._controller = None
+
+    async def async_added_to_hass(self):
+        """Restore the last state."""
+        if (state := await self.async_get_last_state()) and state.state == STATE_ON:
+            await self.async_turn_on()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop the controller when the entity is removed."""
+        self._async_stop_controller()
@@ -6,6 +6,8 @@ from homeassistant.components import mqtt
 from homeassistant.setup import async_setup_component
 import pytest
 
+from .replay import async_setup_chargers
+
 
 @ha.callback
 def mock_component(hass, component):
@@ -53,3 +55,9 @@ async def mqtt_mock(hass, mqtt_client_mock, mqtt_config):
     component = hass.data["mqtt"]
     component.reset_mock()
     return component
+
+
+@pytest.fixture
+async def mqtt_receive(hass):
+    """Set up a go-eCharger config entry and return a function to feed it messages."""
+    return await async_setup_chargers(hass, ["000001"])
@@ -0,0 +1,221 @@
+"""Replay helpers for the go-eCharger (MQTT) benchmarks.
+
+The capture in mqtt-capture.log has no timestamps and is sorted by topic. The
+n-th message of a key is assumed to be published n seconds into the capture,
+which restores the one second cadence of the telemetry keys.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.goecharger_mqtt import dispatcher
+from custom_components.goecharger_mqtt.const import DOMAIN
+from custom_components.goecharger_mqtt.decode import BACKEND
+from custom_components.goecharger_mqtt.dispatcher import topic_matches
+
+CAPTURE = Path(__file__).parent.parent / "mqtt-capture.log"
+BASELINE = Path(__file__).parent / "replay_baseline.json"
+
+
+async def async_setup_chargers(
+    hass: HomeAssistant,
+    serial_numbers: list[str],
+    topic_prefix: str = "/go-eCharger",
+    options: dict | None = None,
+) -> Callable[[str, str], None]:
+    """Set up a config entry per serial and return a function to feed messages.
+
+    The returned function delivers a message to every subscription matching
+    it, like a broker would.
+    """
+    subscriptions: dict[str, list[Callable]] = defaultdict(list)
+
+    async def subscribe(hass, topic, msg_callback, qos):
+        subscriptions[topic].append(msg_callback)
+        return MagicMock()
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_subscribe",
+        side_effect=subscribe,
+    ), patch("custom_components.goecharger_mqtt.DISCOVERY_TIMEOUT", 0):
+        for serial_number in serial_numbers:
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                title=f"go-eCharger {serial_number}",
+                data={"serial_number": serial_number, "topic_prefix": topic_prefix},
+                options=options or {},
+            )
+            entry.add_to_hass(hass)
+            assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    levels = topic_prefix.count("/") + 2
+
+    def receive(topic: str, payload: str) -> None:
+        """Deliver a message like the MQTT client would."""
+        callbacks = subscriptions.get(topic)
+        if callbacks is None:
+            base = "/".join(topic.split("/")[:levels])
+            callbacks = subscriptions.get(f"{base}/#")
+        if callbacks is None:
+            callbacks = [
+                msg_callback
+                for subscription, msg_callbacks in subscriptions.items()
+                if topic_matches(subscription, topic)
+                for msg_callback in msg_callbacks
+            ]
+        message = SimpleNamespace(topic=topic, payload=payload)
+        for msg_callback in callbacks:
+            msg_callback(message)
+
+    receive.subscriptions = subscriptions
+    return receive
+
+
+def load_capture(
+    path: Path = CAPTURE, serial_number: str | None = None
+) -> list[tuple[float, str, str]]:
+    """Return (second, topic, payload) tuples of a capture in publish order."""
+    occurrences: dict[str, int] = defaultdict(int)
+    messages = []
+    with open(path, encoding="utf-8") as capture:
+        for line in capture:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            topic, payload = line.split(" ", 1)
+            if serial_number is not None:
+                prefix, _, key = topic.rsplit("/", 2)
+                topic = f"{prefix}/{serial_number}/{key}"
+            messages.append((occurrences[topic], topic, payload))
+            occurrences[topic] += 1
+
+    return sorted(messages, key=lambda message: message[0])
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class ReplayStats:
+    """Measurements of a replay run."""
+
+    messages: int = 0
+    elapsed: float = 0.0
+    json_loads: int = 0
+    state_writes: int = 0
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+
+    @property
+    def messages_per_second(self) -> float:
+        """Return the callback throughput."""
+        return self.messages / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        """Return the deterministic counters, as stored in the baseline."""
+        return {
+            "messages": self.messages,
+            "json_loads_per_message": round(self.json_loads / self.messages, 3),
+            "state_writes_per_message": round(self.state_writes / self.messages, 3),
+        }
+
+    def report(self) -> str:
+        """Return a human readable report."""
+        lines = [
+            f"messages: {self.messages}",
+            f"messages/s: {self.messages_per_second:.0f}",
+            f"JSON decodes ({BACKEND}): {self.json_loads}",
+            f"state writes per message: {self.state_writes / self.messages:.3f}",
+            "",
+            f"{'key':<16}{'count':>7}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}",
+        ]
+        for key, samples in sorted(
+            self.latencies.items(), key=lambda item: -percentile(item[1], 0.95)
+        ):
+            lines.append(
+                f"{key:<16}{len(samples):>7}"
+                f"{percentile(samples, 0.5) * 1e6:>10.1f}"
+                f"{percentile(samples, 0.95) * 1e6:>10.1f}"
+                f"{percentile(samples, 0.99) * 1e6:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+async def async_replay(
+    hass: HomeAssistant,
+    receive,
+    messages: list[tuple[float, str, str]],
+    loops: int = 1,
+    speed: float = 1.0,
+) -> ReplayStats:
+    """Replay messages through receive and measure the callback path.
+
+    The entities see a simulated clock: speed > 1 compresses the capture in
+    time, so more messages fall into the write throttling windows.
+    """
+    # Flush the delayed storage writes of the setup, they would be counted
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=1))
+    await hass.async_block_till_done()
+
+    stats = ReplayStats()
+    duration = max(second for second, _, _ in messages) + 1
+    clock = time.monotonic()
+    start = dt_util.utcnow()
+
+    loads = dispatcher.decode_json
+    write_state = Entity.async_write_ha_state
+
+    # Plain functions instead of mocks keep the measuring overhead low
+    def count_loads(*args, **kwargs):
+        stats.json_loads += 1
+        return loads(*args, **kwargs)
+
+    def count_write(entity):
+        stats.state_writes += 1
+        return write_state(entity)
+
+    with patch.object(dispatcher, "decode_json", count_loads), patch.object(
+        Entity, "async_write_ha_state", count_write
+    ), patch(
+        "custom_components.goecharger_mqtt.entity.time.monotonic"
+    ) as mock_monotonic:
+        for loop in range(loops):
+            for second, topic, payload in messages:
+                offset = (loop * duration + second) / speed
+                mock_monotonic.return_value = clock + offset
+                key = topic.rsplit("/", 1)[-1]
+
+                begin = time.perf_counter()
+                receive(topic, payload)
+                latency = time.perf_counter() - begin
+
+                stats.elapsed += latency
+                stats.latencies[key].append(latency)
+                stats.messages += 1
+
+            # Flush the writes coalesced by min_update_interval
+            elapsed = (loop + 1) * duration / speed
+            mock_monotonic.return_value = clock + elapsed
+            async_fire_time_changed(hass, start + timedelta(seconds=elapsed))
+            await hass.async_block_till_done()
+
+    return stats
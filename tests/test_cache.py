@@ -0,0 +1,112 @@
+"""Test the go-eCharger (MQTT) last known value cache."""
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.goecharger_mqtt.const import DOMAIN
+from custom_components.goecharger_mqtt.dispatcher import (
+    async_acquire_victron_dispatcher,
+)
+
+from .replay import async_setup_chargers
+
+STORAGE_KEY = f"{DOMAIN}.cached_entry"
+
+
+async def test_seed_from_cache(hass: HomeAssistant, hass_storage) -> None:
+    """Test entities start with the cached payloads and the cache is updated."""
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {
+            "last_values": {
+                "/go-eCharger/000001/acu": "16",
+                "/go-eCharger/000001/nrg": "[230,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0]",
+            }
+        },
+    }
+    registry = er.async_get(hass)
+    for unique_id, object_id in (
+        ("000001-sensor-acu-0", "go_echarger_000001_acu"),
+        ("000001-sensor-nrg-0", "go_echarger_000001_nrg"),
+    ):
+        registry.async_get_or_create(
+            "sensor", DOMAIN, unique_id, suggested_object_id=object_id
+        )
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        entry_id="cached_entry",
+        title="go-eCharger 000001",
+        data={"serial_number": "000001", "topic_prefix": "/go-eCharger"},
+    )
+    entry.add_to_hass(hass)
+    subscriptions = {}
+
+    async def subscribe(hass, topic, msg_callback, qos):
+        subscriptions[topic] = msg_callback
+        return MagicMock()
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_subscribe",
+        side_effect=subscribe,
+    ), patch("custom_components.goecharger_mqtt.DISCOVERY_TIMEOUT", 0):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.go_echarger_000001_acu").state == "16"
+    assert hass.states.get("sensor.go_echarger_000001_nrg").state == "230.0"
+
+    receive = subscriptions["/go-eCharger/000001/#"]
+    receive(SimpleNamespace(topic="/go-eCharger/000001/acu", payload="32"))
+    receive(SimpleNamespace(topic="/go-eCharger/000001/acu/set", payload="6"))
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.go_echarger_000001_acu").state == "32"
+    assert (
+        hass_storage[STORAGE_KEY]["data"]["last_values"]["/go-eCharger/000001/acu"]
+        == "16"
+    )
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+    await hass.async_block_till_done()
+    data = hass_storage[STORAGE_KEY]["data"]["last_values"]
+    assert data["/go-eCharger/000001/acu"] == "32"
+    assert "/go-eCharger/000001/acu/set" not in data
+
+
+async def test_unloaded_victron_entry_not_written(
+    hass: HomeAssistant, hass_storage
+) -> None:
+    """Test a Victron dispatcher kept alive stops writing an unloaded entry."""
+    receive = await async_setup_chargers(hass, ["000001"])
+    receive("custom/globalGrid", "-1200")
+    await hass.async_block_till_done()
+    entry = next(
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.data.get("entry_type") == "victron"
+    )
+    # Held like the surplus controller of a charger does
+    dispatcher = await async_acquire_victron_dispatcher(hass, "custom")
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert dispatcher.last_values is None
+    storage_key = f"{DOMAIN}.{entry.entry_id}"
+    assert hass_storage[storage_key]["data"]["last_values"] == {
+        "custom/globalGrid": "-1200"
+    }
+
+    receive("custom/globalGrid", "-600")
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+    await hass.async_block_till_done()
+    assert hass_storage[storage_key]["data"]["last_values"] == {
+        "custom/globalGrid": "-1200"
+    }
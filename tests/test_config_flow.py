@@ -3,17 +3,33 @@ from unittest.mock import patch
 
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
-from homeassistant.data_entry_flow import RESULT_TYPE_CREATE_ENTRY, RESULT_TYPE_FORM
+from homeassistant.data_entry_flow import (
+    RESULT_TYPE_CREATE_ENTRY,
+    RESULT_TYPE_FORM,
+    RESULT_TYPE_MENU,
+)
+import homeassistant.helpers.config_validation as cv
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import voluptuous_serialize
 
 from custom_components.goecharger_mqtt.config_flow import CannotConnect
 from custom_components.goecharger_mqtt.const import DOMAIN
 
 
-async def test_form(hass: HomeAssistant) -> None:
-    """Test we get the form."""
+async def async_init_charger_flow(hass: HomeAssistant) -> dict:
+    """Start a user flow and pick the charger from the menu."""
     result = await hass.config_entries.flow.async_init(
         DOMAIN, context={"source": config_entries.SOURCE_USER}
     )
+    assert result["type"] == RESULT_TYPE_MENU
+    return await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "charger"}
+    )
+
+
+async def test_form(hass: HomeAssistant) -> None:
+    """Test we get the form."""
+    result = await async_init_charger_flow(hass)
     assert result["type"] == RESULT_TYPE_FORM
     assert result["errors"] is None
 
@@ -40,9 +56,7 @@ async def test_form(hass: HomeAssistant) -> None:
 
 async def test_form_cannot_connect(hass: HomeAssistant) -> None:
     """Test we handle cannot connect error."""
-    result = await hass.config_entries.flow.async_init(
-        DOMAIN, context={"source": config_entries.SOURCE_USER}
-    )
+    result = await async_init_charger_flow(hass)
 
     with patch(
         "custom_components.goecharger_mqtt.config_flow.PlaceholderHub.validate_device_topic",
@@ -55,3 +69,63 @@ async def test_form_cannot_connect(hass: HomeAssistant) -> None:
 
     assert result2["type"] == RESULT_TYPE_FORM
     assert result2["errors"] == {"base": "cannot_connect"}
+
+
+async def test_form_victron(hass: HomeAssistant) -> None:
+    """Test the Victron entry is created once."""
+    for _ in range(2):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"next_step_id": "victron"}
+        )
+        assert result["type"] == RESULT_TYPE_FORM
+
+        with patch(
+            "custom_components.goecharger_mqtt.async_setup_entry", return_value=True
+        ):
+            result2 = await hass.config_entries.flow.async_configure(
+                result["flow_id"], {"victron_topic_prefix": "venus"}
+            )
+            await hass.async_block_till_done()
+
+    assert result2["type"] == "abort"
+    assert [entry.data for entry in hass.config_entries.async_entries(DOMAIN)] == [
+        {"entry_type": "victron", "victron_topic_prefix": "venus"}
+    ]
+
+
+async def test_options_flow(hass: HomeAssistant) -> None:
+    """Test the options form can be shown and the windows are parsed."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="go-eCharger 000001",
+        data={"serial_number": "000001", "topic_prefix": "/go-eCharger"},
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == RESULT_TYPE_FORM
+    # Serialized like the frontend does, fails for schemas it cannot render
+    voluptuous_serialize.convert(
+        result["data_schema"], custom_serializer=cv.custom_serializer
+    )
+
+    user_input = {"statistics_windows": "60, 10, x", "profiling": False}
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {**user_input, "controller_tick": 2}
+    )
+    assert result["type"] == RESULT_TYPE_FORM
+    assert result["errors"] == {"statistics_windows": "invalid_statistics_windows"}
+
+    user_input["statistics_windows"] = "60, 10"
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {**user_input, "controller_tick": 2}
+    )
+    assert result["type"] == RESULT_TYPE_CREATE_ENTRY
+    assert entry.options == {
+        "statistics_windows": [10, 60],
+        "profiling": False,
+        "controller_tick": 2,
+    }
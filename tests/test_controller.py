@@ -0,0 +1,142 @@
+"""Test the go-eCharger (MQTT) PV surplus controller."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.goecharger_mqtt.controller import (
+    PSM_SINGLE_PHASE,
+    PSM_THREE_PHASES,
+    surplus_target,
+)
+
+
+def test_surplus_target() -> None:
+    """Test the hysteresis of the phase switching and the current."""
+    # Below the minimum current the minimum is held
+    assert surplus_target(500, None, None) == (PSM_SINGLE_PHASE, 6)
+    assert surplus_target(2530, PSM_SINGLE_PHASE, 6) == (PSM_SINGLE_PHASE, 10)
+    # Raised only once the next step is exceeded by the hysteresis
+    assert surplus_target(2400, PSM_SINGLE_PHASE, 10) == (PSM_SINGLE_PHASE, 10)
+    assert surplus_target(2645, PSM_SINGLE_PHASE, 10) == (PSM_SINGLE_PHASE, 11)
+    # Lowered right away
+    assert surplus_target(2250, PSM_SINGLE_PHASE, 10) == (PSM_SINGLE_PHASE, 9)
+    # Switched to three phases 500 W above the minimum three phase power
+    assert surplus_target(4500, PSM_SINGLE_PHASE, 16) == (PSM_SINGLE_PHASE, 16)
+    assert surplus_target(4700, PSM_SINGLE_PHASE, 16) == (PSM_THREE_PHASES, 6)
+    assert surplus_target(4500, PSM_SINGLE_PHASE, 16, False) == (PSM_SINGLE_PHASE, 16)
+    assert surplus_target(3700, PSM_THREE_PHASES, 6) == (PSM_THREE_PHASES, 6)
+    assert surplus_target(3600, PSM_THREE_PHASES, 6) == (PSM_SINGLE_PHASE, 15)
+
+
+async def test_surplus_control(hass: HomeAssistant, mqtt_receive) -> None:
+    """Test amp and psm are published on change only, once per tick at most."""
+    published = []
+
+    async def publish(hass, topic, payload):
+        published.append((topic.rsplit("/", 2)[1], payload))
+
+    def advance(seconds: float) -> None:
+        mock_monotonic.return_value += seconds
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=seconds))
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_publish",
+        side_effect=publish,
+    ), patch(
+        "custom_components.goecharger_mqtt.controller.DEFAULT_SET_TIMEOUT", 0
+    ), patch(
+        "custom_components.goecharger_mqtt.controller.time.monotonic"
+    ) as mock_monotonic:
+        mock_monotonic.return_value = 1000
+        mqtt_receive("/go-eCharger/000001/psm", "1")
+        mqtt_receive("/go-eCharger/000001/amp", "6")
+        await hass.services.async_call(
+            "switch",
+            "turn_on",
+            {"entity_id": "switch.go_echarger_000001_surplus_control"},
+            blocking=True,
+        )
+        mqtt_receive(
+            "/go-eCharger/000001/nrg", "[230,0,0,0,6,0,0,1380,0,0,0,1380,0,0,0,0]"
+        )
+        # 1380 W charging, 1150 W exported, recomputed once the tick passed
+        mqtt_receive("custom/globalGrid", "-1150")
+        await hass.async_block_till_done()
+        assert published == []
+
+        advance(2)
+        await hass.async_block_till_done()
+        assert published == [("amp", "10")]
+
+        # A burst within the tick is recomputed once with the latest values
+        advance(10)
+        mqtt_receive("custom/globalGrid", "-1200")
+        mqtt_receive("custom/globalGrid", "-3000")
+        mqtt_receive("custom/globalGrid", "-1600")
+        await hass.async_block_till_done()
+        assert published == [("amp", "10")]
+        advance(2)
+        await hass.async_block_till_done()
+        assert published == [("amp", "10"), ("amp", "12")]
+
+        # Rate limited until SURPLUS_AMP_INTERVAL passed
+        mqtt_receive("custom/batteryPower", "-1000")
+        advance(2)
+        await hass.async_block_till_done()
+        assert published == [("amp", "10"), ("amp", "12")]
+        advance(8)
+        mqtt_receive("custom/batteryPower", "-1001")
+        await hass.async_block_till_done()
+        assert published == [("amp", "10"), ("amp", "12"), ("amp", "8")]
+
+        await hass.services.async_call(
+            "switch",
+            "turn_off",
+            {"entity_id": "switch.go_echarger_000001_surplus_control"},
+            blocking=True,
+        )
+        advance(20)
+        mqtt_receive("custom/batteryPower", "0")
+        await hass.async_block_till_done()
+        assert len(published) == 3
+
+
+async def test_surplus_control_replayed_inputs(
+    hass: HomeAssistant, mqtt_receive
+) -> None:
+    """Test inputs received before turning on recompute with the charger state."""
+    published = []
+
+    async def publish(hass, topic, payload):
+        published.append((topic.rsplit("/", 2)[1], payload))
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_publish",
+        side_effect=publish,
+    ), patch("custom_components.goecharger_mqtt.controller.DEFAULT_SET_TIMEOUT", 0):
+        # Charging with 16 A on three phases, 500 W exported
+        mqtt_receive("custom/globalGrid", "-500")
+        mqtt_receive("/go-eCharger/000001/psm", "2")
+        mqtt_receive("/go-eCharger/000001/amp", "16")
+        mqtt_receive(
+            "/go-eCharger/000001/nrg",
+            "[230,230,230,0,16,16,16,3680,3680,3680,0,11040,0,0,0,0]",
+        )
+        await hass.services.async_call(
+            "switch",
+            "turn_on",
+            {"entity_id": "switch.go_echarger_000001_surplus_control"},
+            blocking=True,
+        )
+        await hass.async_block_till_done()
+        assert published == []
+
+        await hass.services.async_call(
+            "switch",
+            "turn_off",
+            {"entity_id": "switch.go_echarger_000001_surplus_control"},
+            blocking=True,
+        )
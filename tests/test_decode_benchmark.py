@@ -0,0 +1,58 @@
+"""Micro-benchmark of the payload decoding.
+
+Run with `pytest tests/test_decode_benchmark.py -s` to print the report.
+GOE_DECODE_ROUNDS sets how often the capture payloads are decoded.
+"""
+import json
+import os
+import time
+
+from custom_components.goecharger_mqtt.decode import (
+    BACKEND,
+    decode_json,
+    loads,
+    scalar_fast_path,
+)
+
+from .replay import load_capture
+
+ROUNDS = int(os.environ.get("GOE_DECODE_ROUNDS", 200))
+
+
+def measure(decoder, payloads: list[str]) -> float:
+    """Return the seconds the decoder takes for all payloads and rounds."""
+    begin = time.perf_counter()
+    for _ in range(ROUNDS):
+        for payload in payloads:
+            decoder(payload)
+    return time.perf_counter() - begin
+
+
+def test_decode_capture() -> None:
+    """Decode the capture payloads with every decoder and report the cost."""
+    payloads = [payload for _, _, payload in load_capture()]
+    decoders = {
+        "json.loads": json.loads,
+        "json.loads with fast path": scalar_fast_path(json.loads),
+        f"{BACKEND}.loads": loads,
+        f"{BACKEND}.loads with fast path": scalar_fast_path(loads),
+    }
+
+    # Same result as the stdlib for every payload of the capture
+    extra = ['"a\\"b"', '"go-e"', "-12", "1.5", "1e3", "[1]", "{}", '""']
+    for payload in payloads + extra:
+        for decoder in decoders.values():
+            assert decoder(payload) == json.loads(payload), payload
+
+    count = ROUNDS * len(payloads)
+    stdlib = measure(json.loads, payloads)
+    print()
+    print(f"payloads: {count}, decode_json uses {BACKEND}")
+    for name, decoder in decoders.items():
+        elapsed = measure(decoder, payloads)
+        print(
+            f"{name:<32}{elapsed / count * 1e9:>8.0f} ns/payload"
+            f"{stdlib / elapsed:>6.1f}x"
+        )
+
+    assert decode_json is loads or BACKEND == "json"
@@ -0,0 +1,55 @@
+"""Test the go-eCharger (MQTT) diagnostics."""
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.goecharger_mqtt.const import DOMAIN
+from custom_components.goecharger_mqtt.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+from .replay import async_setup_chargers
+
+
+async def test_profiling(hass: HomeAssistant) -> None:
+    """Test the per key counters are exposed when profiling is enabled."""
+    receive = await async_setup_chargers(hass, ["000001"], options={"profiling": True})
+    receive("/go-eCharger/000001/acu", "16")
+    receive("/go-eCharger/000001/acu", "16")
+    receive("/go-eCharger/000001/nrg", "[230,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0]")
+    receive("/go-eCharger/000001/amp/result", "ok")
+    await hass.async_block_till_done()
+
+    entry = next(
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.data.get("serial_number") == "000001"
+    )
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    profiling = diagnostics["profiling"]
+    assert profiling["acu"]["messages"] == 2
+    assert profiling["acu"]["decodes"] == 0
+    assert profiling["acu"]["state_writes"] == 1
+    assert profiling["nrg"]["messages"] == 1
+    assert profiling["nrg"]["decodes"] == 1
+    assert profiling["nrg"]["exceptions"] == 0
+    assert profiling["amp/result"]["messages"] == 1
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.go_echarger_000001_profiling")
+    assert state.state in profiling
+    assert state.attributes["acu"]["messages"] == 2
+
+
+async def test_no_profiling(hass: HomeAssistant) -> None:
+    """Test nothing is counted without the option."""
+    await async_setup_chargers(hass, ["000001"])
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["profiling"] is None
+    assert diagnostics["base_topic"] == "/go-eCharger/000001/"
+    assert not hass.states.get("sensor.go_echarger_000001_profiling")
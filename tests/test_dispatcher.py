@@ -0,0 +1,201 @@
+"""Test the go-eCharger (MQTT) dispatcher."""
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.goecharger_mqtt.decode import decode_json
+from custom_components.goecharger_mqtt.definitions.sensor import VICTRON_SENSORS
+from custom_components.goecharger_mqtt.dispatcher import (
+    GoEChargerDispatcher,
+    VenusDispatcher,
+    async_acquire_victron_dispatcher,
+    async_release_victron_dispatcher,
+    topic_matches,
+)
+from custom_components.goecharger_mqtt.profiling import DispatchProfiler
+
+
+def test_topic_matches() -> None:
+    """Test the MQTT wildcard matching."""
+    assert topic_matches("/go-eCharger/012345/#", "/go-eCharger/012345/nrg")
+    assert topic_matches(
+        "/go-eCharger/012345/+/result", "/go-eCharger/012345/amp/result"
+    )
+    assert not topic_matches("/go-eCharger/012345/+/result", "/go-eCharger/012345/amp")
+    assert not topic_matches("/go-eCharger/012345/nrg", "/go-eCharger/012345/nrg/set")
+
+
+async def test_dispatcher_fan_out(hass: HomeAssistant) -> None:
+    """Test one subscription per charger fans out to all registered callbacks."""
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_subscribe",
+        return_value=MagicMock(),
+    ) as mock_subscribe:
+        dispatcher = GoEChargerDispatcher(hass, "/go-eCharger", "012345")
+        await dispatcher.async_subscribe()
+
+        voltage_l1 = MagicMock()
+        voltage_l2 = MagicMock()
+        result = MagicMock()
+        grid = MagicMock()
+        await dispatcher.async_register("/go-eCharger/012345/nrg", voltage_l1)
+        unregister = await dispatcher.async_register(
+            "/go-eCharger/012345/nrg", voltage_l2
+        )
+        await dispatcher.async_register("/go-eCharger/012345/+/result", result)
+        await dispatcher.async_register("custom/globalGrid", grid)
+        await dispatcher.async_register("custom/globalGrid", grid)
+
+    assert [call.args[1] for call in mock_subscribe.mock_calls] == [
+        "/go-eCharger/012345/#",
+        "custom/globalGrid",
+    ]
+
+    receive = mock_subscribe.mock_calls[0].args[2]
+    message = SimpleNamespace(topic="/go-eCharger/012345/nrg", payload="[230,0]")
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.decode_json",
+        side_effect=decode_json,
+    ) as mock_loads:
+        receive(message)
+
+        decoded = voltage_l1.call_args.args[0]
+        assert voltage_l2.call_args.args[0] is decoded
+        assert decoded.payload == "[230,0]"
+        assert decoded.json == [230, 0]
+        assert voltage_l2.call_args.args[0].json == [230, 0]
+    assert mock_loads.call_count == 1
+
+    unregister()
+    receive(message)
+    assert voltage_l1.call_count == 2
+    assert voltage_l2.call_count == 1
+
+    receive(SimpleNamespace(topic="/go-eCharger/012345/amp/result", payload="ok"))
+    assert result.call_count == 1
+
+    receive(SimpleNamespace(topic="custom/globalGrid", payload="1200"))
+    assert grid.call_count == 2
+    assert voltage_l1.call_count == 2
+
+    # Late registrations get the last message right away
+    late = MagicMock()
+    await dispatcher.async_register("/go-eCharger/012345/nrg", late)
+    assert late.call_args.args[0].payload == "[230,0]"
+
+
+async def test_venus_dispatcher(hass: HomeAssistant) -> None:
+    """Test Venus OS values are summed up and handed out on the Victron topics."""
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_subscribe",
+        return_value=MagicMock(),
+    ) as mock_subscribe, patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_publish"
+    ) as mock_publish:
+        dispatcher = VenusDispatcher(hass, "custom", "c0619ab1", VICTRON_SENSORS)
+        await dispatcher.async_subscribe()
+        assert mock_publish.call_args.args[1:] == ("R/c0619ab1/keepalive", "")
+
+        grid = MagicMock()
+        await dispatcher.async_register("custom/globalGrid", grid)
+        receive = mock_subscribe.mock_calls[0].args[2]
+        for phase, payload in (("L1", '{"value": 1200}'), ("L2", '{"value": -200}')):
+            receive(
+                SimpleNamespace(
+                    topic=f"N/c0619ab1/system/0/Ac/Grid/{phase}/Power", payload=payload
+                )
+            )
+        assert [call.args[0].payload for call in grid.mock_calls] == ["1200", "1000"]
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=31))
+        await hass.async_block_till_done()
+        assert mock_publish.call_args.args[1:] == (
+            "R/c0619ab1/keepalive",
+            '{"keepalive-options": ["suppress-republish"]}',
+        )
+
+        dispatcher.async_unsubscribe()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=62))
+        await hass.async_block_till_done()
+        assert mock_publish.call_count == 2
+
+
+async def test_large_payload_decoded_in_executor(hass: HomeAssistant) -> None:
+    """Test large payloads are decoded off the event loop and can be superseded."""
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_subscribe",
+        return_value=MagicMock(),
+    ) as mock_subscribe, patch(
+        "custom_components.goecharger_mqtt.dispatcher.LARGE_PAYLOAD_SIZE", 10
+    ):
+        dispatcher = GoEChargerDispatcher(hass, "/go-eCharger", "012345")
+        await dispatcher.async_subscribe()
+        cards = MagicMock()
+        await dispatcher.async_register("/go-eCharger/012345/cards", cards)
+        receive = mock_subscribe.mock_calls[0].args[2]
+
+        payload = '[{"name":"User 1","energy":0}]'
+        receive(SimpleNamespace(topic="/go-eCharger/012345/cards", payload=payload))
+        assert cards.call_count == 0
+        await hass.async_block_till_done()
+        assert cards.call_count == 1
+        assert cards.call_args.args[0]._json == [{"name": "User 1", "energy": 0}]
+
+        # A newer message arriving while decoding wins
+        receive(SimpleNamespace(topic="/go-eCharger/012345/cards", payload=payload))
+        receive(SimpleNamespace(topic="/go-eCharger/012345/cards", payload="[]"))
+        await hass.async_block_till_done()
+        assert [call.args[0].payload for call in cards.mock_calls[1:]] == ["[]"]
+
+
+async def test_failing_callback_isolated(hass: HomeAssistant) -> None:
+    """Test a raising callback does not keep the others from the message."""
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_subscribe",
+        return_value=MagicMock(),
+    ) as mock_subscribe:
+        dispatcher = GoEChargerDispatcher(hass, "/go-eCharger", "012345")
+        await dispatcher.async_subscribe()
+
+        failing = MagicMock(side_effect=ValueError)
+        working = MagicMock()
+        await dispatcher.async_register("/go-eCharger/012345/car", failing)
+        await dispatcher.async_register("/go-eCharger/012345/car", working)
+
+    receive = mock_subscribe.mock_calls[0].args[2]
+    receive(SimpleNamespace(topic="/go-eCharger/012345/car", payload="null"))
+    assert working.call_count == 1
+
+    dispatcher.profiler = DispatchProfiler()
+    receive(SimpleNamespace(topic="/go-eCharger/012345/car", payload="null"))
+    assert working.call_count == 2
+    assert dispatcher.profiler.keys["car"].exceptions == 1
+
+
+async def test_shared_victron_dispatchers(hass: HomeAssistant) -> None:
+    """Test Victron dispatchers are shared per topic prefix and portal id."""
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_subscribe",
+        return_value=MagicMock(),
+    ), patch("custom_components.goecharger_mqtt.dispatcher.mqtt.async_publish"):
+        plain = await async_acquire_victron_dispatcher(hass, "custom")
+        assert await async_acquire_victron_dispatcher(hass, "custom", "") is plain
+        venus = await async_acquire_victron_dispatcher(hass, "custom", "c0619ab1")
+        assert isinstance(venus, VenusDispatcher)
+
+        async_release_victron_dispatcher(hass, plain)
+        async_release_victron_dispatcher(hass, plain)
+        assert (
+            await async_acquire_victron_dispatcher(hass, "custom", "c0619ab1") is venus
+        )
+        released = plain
+        plain = await async_acquire_victron_dispatcher(hass, "custom")
+        assert plain is not released
+        assert plain.portal_id is None
+
+        for dispatcher in (venus, venus, plain):
+            async_release_victron_dispatcher(hass, dispatcher)
@@ -0,0 +1,155 @@
+"""Scale test of the go-eCharger (MQTT) integration with many chargers.
+
+Run with `GOE_FLEET_SIZES=1,20,50 pytest tests/test_fleet_benchmark.py -s`
+to print the report. GOE_FLEET_SIZES sets the fleet sizes, only a single
+charger is set up by default to keep the regular test run fast.
+GOE_FLEET_REPORT names a JSON file the results are written to, so they can be
+compared across releases.
+"""
+import json
+import os
+import time
+import tracemalloc
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.goecharger_mqtt.binary_sensor import GoEChargerBinarySensor
+from custom_components.goecharger_mqtt.button import GoEChargerButton
+from custom_components.goecharger_mqtt.const import DOMAIN
+from custom_components.goecharger_mqtt.definitions.binary_sensor import BINARY_SENSORS
+from custom_components.goecharger_mqtt.definitions.button import BUTTONS
+from custom_components.goecharger_mqtt.definitions.number import NUMBERS
+from custom_components.goecharger_mqtt.definitions.select import SELECTS
+from custom_components.goecharger_mqtt.definitions.sensor import GOE_SENSORS
+from custom_components.goecharger_mqtt.definitions.switch import SWITCHES
+from custom_components.goecharger_mqtt.number import GoEChargerNumber
+from custom_components.goecharger_mqtt.select import GoEChargerSelect
+from custom_components.goecharger_mqtt.sensor import GoEChargerSensor
+from custom_components.goecharger_mqtt.switch import GoEChargerSwitch
+
+from .replay import async_setup_chargers, load_capture, percentile
+
+FLEET_SIZES = [int(size) for size in os.environ.get("GOE_FLEET_SIZES", "1").split(",")]
+REPORT: dict[int, dict] = {}
+
+
+def serial_numbers(count: int) -> list[str]:
+    """Return synthetic 6-digit serial numbers."""
+    return [f"{100000 + index}" for index in range(count)]
+
+
+@pytest.mark.parametrize("count", FLEET_SIZES)
+async def test_fleet(hass: HomeAssistant, count: int) -> None:
+    """Set up a fleet, replay the capture for every charger and report the cost."""
+    serials = serial_numbers(count)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    begin = time.perf_counter()
+    receive = await async_setup_chargers(hass, serials)
+    setup_time = time.perf_counter() - begin
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    # The Victron entry is shared by the fleet and not counted
+    chargers = {
+        entry.entry_id
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if "serial_number" in entry.data
+    }
+    entities = len(
+        [
+            entry
+            for entry in er.async_get(hass).entities.values()
+            if entry.config_entry_id in chargers
+        ]
+    )
+
+    # Every simulated second all chargers publish their messages of that
+    # second in one burst. The time spent on a burst is the lag other tasks
+    # on the event loop see.
+    bursts: dict[float, list[tuple[str, str]]] = {}
+    for serial_number in serials:
+        for second, topic, payload in load_capture(serial_number=serial_number):
+            bursts.setdefault(second, []).append((topic, payload))
+
+    lags = []
+    messages = 0
+    for burst in bursts.values():
+        begin = time.perf_counter()
+        for topic, payload in burst:
+            receive(topic, payload)
+        lags.append(time.perf_counter() - begin)
+        messages += len(burst)
+        await hass.async_block_till_done()
+
+    subscriptions = sum(
+        len(callbacks)
+        for topic, callbacks in receive.subscriptions.items()
+        if topic != "custom/#"
+    )
+    REPORT[count] = {
+        "chargers": count,
+        "entities": entities,
+        "subscriptions": subscriptions,
+        "setup_seconds": round(setup_time, 3),
+        "setup_ms_per_charger": round(setup_time / count * 1000, 1),
+        "bytes_per_entity": memory // entities,
+        "messages_per_second": round(messages / sum(lags)),
+        "loop_lag_p50_ms": round(percentile(lags, 0.5) * 1000, 2),
+        "loop_lag_max_ms": round(max(lags) * 1000, 2),
+    }
+
+    print()
+    print(" ".join(f"{key}={value}" for key, value in REPORT[count].items()))
+    if report_path := os.environ.get("GOE_FLEET_REPORT"):
+        with open(report_path, "w", encoding="utf-8") as report:
+            json.dump(list(REPORT.values()), report, indent=2)
+
+    # The per-charger cost must not depend on the fleet size
+    assert entities % count == 0
+    assert subscriptions % count == 0
+
+
+def test_entity_memory() -> None:
+    """Report the bytes per entity object of a 20 charger fleet."""
+    platforms = [
+        (GoEChargerSensor, GOE_SENSORS),
+        (GoEChargerBinarySensor, BINARY_SENSORS),
+        (GoEChargerButton, BUTTONS),
+        (GoEChargerNumber, NUMBERS),
+        (GoEChargerSelect, SELECTS),
+        (GoEChargerSwitch, SWITCHES),
+    ]
+    config_entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            title=f"go-eCharger {serial_number}",
+            data={"serial_number": serial_number, "topic_prefix": "/go-eCharger"},
+        )
+        for serial_number in serial_numbers(20)
+    ]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [
+        entity_class(config_entry, description)
+        for config_entry in config_entries
+        for entity_class, descriptions in platforms
+        for description in descriptions
+        if not description.disabled
+    ]
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print()
+    print(f"entities={len(entities)} bytes_per_entity={memory // len(entities)}")
+
+    # One device info object per charger, one topic string per charger key
+    assert len({id(entity.device_info) for entity in entities}) == 20
+    assert len({id(entity._topic) for entity in entities}) == len(
+        {entity._topic for entity in entities}
+    )
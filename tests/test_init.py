@@ -0,0 +1,143 @@
+"""Test the go-eCharger (MQTT) setup."""
+from types import SimpleNamespace
+from unittest.mock import ANY, MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.goecharger_mqtt.const import DOMAIN
+
+from .replay import async_setup_chargers
+
+
+async def test_discover_published_keys(hass: HomeAssistant) -> None:
+    """Test only entities of published keys are created, late keys are added."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="go-eCharger 000001",
+        data={"serial_number": "000001", "topic_prefix": "/go-eCharger"},
+    )
+    entry.add_to_hass(hass)
+    subscriptions = {}
+
+    async def subscribe(hass, topic, msg_callback, qos):
+        subscriptions[topic] = msg_callback
+        if topic == "/go-eCharger/000001/#":
+            for key, payload in (("car", "1"), ("nrg", "[230,0,0,0,1,0,0,0,0,0,0,0]")):
+                hass.loop.call_soon(
+                    msg_callback,
+                    SimpleNamespace(
+                        topic=f"/go-eCharger/000001/{key}", payload=payload
+                    ),
+                )
+        return MagicMock()
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_subscribe",
+        side_effect=subscribe,
+    ), patch("custom_components.goecharger_mqtt.DISCOVERY_QUIET_PERIOD", 0.1):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    registry = er.async_get(hass)
+    assert registry.async_get_entity_id("sensor", DOMAIN, "000001-sensor-car-car")
+    assert registry.async_get_entity_id("sensor", DOMAIN, "000001-sensor-nrg-0")
+    assert registry.async_get_entity_id("sensor", DOMAIN, "000001-sensor-+/result-0")
+    assert registry.async_get_entity_id("sensor", DOMAIN, "victron-sensor-globalGrid-0")
+    assert registry.async_get_entity_id("button", DOMAIN, "000001-button-rst-0")
+    assert not registry.async_get_entity_id("sensor", DOMAIN, "000001-sensor-acu-0")
+
+    subscriptions["/go-eCharger/000001/#"](
+        SimpleNamespace(topic="/go-eCharger/000001/acu", payload="16")
+    )
+    await hass.async_block_till_done()
+
+    assert registry.async_get_entity_id("sensor", DOMAIN, "000001-sensor-acu-0")
+    assert hass.states.get("sensor.go_echarger_000001_acu").state == "16"
+
+    # Sub-topics of a key, e.g. the echo of our own write, do not add it
+    receive = subscriptions["/go-eCharger/000001/#"]
+    receive(SimpleNamespace(topic="/go-eCharger/000001/ama/set", payload="32"))
+    await hass.async_block_till_done()
+    assert not registry.async_get_entity_id("number", DOMAIN, "000001-number-ama-0")
+    receive(SimpleNamespace(topic="/go-eCharger/000001/ama", payload="16"))
+    await hass.async_block_till_done()
+    assert hass.states.get("number.go_echarger_000001_ama").state == "16"
+
+    # A bad first payload does not keep the entities from being added
+    receive(SimpleNamespace(topic="/go-eCharger/000001/cards", payload="null"))
+    await hass.async_block_till_done()
+    assert registry.async_get_entity_id("sensor", DOMAIN, "000001-sensor-cards-0")
+    receive(
+        SimpleNamespace(
+            topic="/go-eCharger/000001/cards",
+            payload='[{"name": "User 1", "energy": 1500}]',
+        )
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.go_echarger_000001_cards").state == "1500"
+
+
+async def test_shared_victron_entry(hass: HomeAssistant) -> None:
+    """Test the Victron entry is created once and shared by all chargers."""
+    registry = er.async_get(hass)
+    registry.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "000001-sensor-globalGrid-0",
+        suggested_object_id="custom_globalgrid",
+    )
+
+    receive = await async_setup_chargers(hass, ["000001", "000002"])
+
+    assert [
+        entry.title
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.data.get("entry_type") == "victron"
+    ] == ["Victron"]
+    assert list(receive.subscriptions["custom/#"]) == [ANY]
+    assert not registry.async_get_entity_id(
+        "sensor", DOMAIN, "000001-sensor-globalGrid-0"
+    )
+
+    receive("custom/globalGrid", "-1200")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.custom_globalgrid").state == "-1200"
+    assert not hass.states.get("sensor.custom_globalgrid_2")
+
+
+async def test_set_config_keys(hass: HomeAssistant) -> None:
+    """Test config keys are set on all chargers and the acknowledgements returned."""
+    receive = await async_setup_chargers(hass, ["000001", "000002"])
+    published = []
+
+    async def publish(hass, topic, payload):
+        published.append((topic, payload))
+        if topic != "/go-eCharger/000002/psm/set":
+            hass.loop.call_soon(receive, topic.replace("/set", "/result"), "ok")
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_publish",
+        side_effect=publish,
+    ):
+        response = await hass.services.async_call(
+            DOMAIN,
+            "set_config_keys",
+            {"values": {"amp": 16, "psm": "1", "fna": "go-e"}, "timeout": 0.1},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert sorted(published) == [
+        ("/go-eCharger/000001/amp/set", "16"),
+        ("/go-eCharger/000001/fna/set", '"go-e"'),
+        ("/go-eCharger/000001/psm/set", "1"),
+        ("/go-eCharger/000002/amp/set", "16"),
+        ("/go-eCharger/000002/fna/set", '"go-e"'),
+        ("/go-eCharger/000002/psm/set", "1"),
+    ]
+    assert response == {
+        "000001": {"amp": "ok", "psm": "ok", "fna": "ok"},
+        "000002": {"amp": "ok", "psm": None, "fna": "ok"},
+    }
@@ -0,0 +1,45 @@
+"""Test the go-eCharger (MQTT) nrg snapshot."""
+from custom_components.goecharger_mqtt.definitions.sensor import GOE_SENSORS
+from custom_components.goecharger_mqtt.dispatcher import GoEChargerMessage
+from custom_components.goecharger_mqtt.nrg import NrgSnapshot
+
+NRG = "[230,231,229,1,10,10.5,0,2300,2400,0,0,4700,99,98,0,0]"
+
+
+def test_nrg_snapshot() -> None:
+    """Test the values are decoded once and read by name."""
+    message = GoEChargerMessage("/go-eCharger/000001/nrg", NRG)
+    snapshot = message.nrg
+    assert message.nrg is snapshot
+
+    assert (snapshot.u1, snapshot.u2, snapshot.u3, snapshot.un) == (230, 231, 229, 1)
+    assert (snapshot.i1, snapshot.i2, snapshot.i3) == (10, 10.5, 0)
+    assert (snapshot.p1, snapshot.p2, snapshot.p3, snapshot.pn) == (2300, 2400, 0, 0)
+    assert snapshot.ptotal == 4700
+    assert snapshot.pf == (99, 98, 0, 0)
+    assert (snapshot.s1, snapshot.s2, snapshot.s3) == (2300, 2425.5, 0)
+    assert snapshot.stotal == 4725.5
+
+    assert NrgSnapshot.from_json([230, 0]) is None
+    assert NrgSnapshot.from_json([None] * 16) is None
+    assert NrgSnapshot.from_json({"u1": 230}) is None
+
+
+def test_nrg_sensors() -> None:
+    """Test the nrg sensors read their value from the snapshot."""
+    message = GoEChargerMessage("/go-eCharger/000001/nrg", NRG)
+    values = {
+        description.attribute: description.decoder(message)
+        for description in GOE_SENSORS
+        if description.key == "nrg"
+    }
+    assert values["0"] == 230
+    assert values["11"] == 4700
+    assert values["s2"] == 2425.5
+
+    invalid = GoEChargerMessage("/go-eCharger/000001/nrg", "[230,0]")
+    assert {
+        description.decoder(invalid)
+        for description in GOE_SENSORS
+        if description.key == "nrg"
+    } == {None}
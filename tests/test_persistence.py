@@ -0,0 +1,55 @@
+"""Test the go-eCharger (MQTT) state writer."""
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.goecharger_mqtt.const import DOMAIN
+from custom_components.goecharger_mqtt.persistence import EntryStateWriter
+
+STORAGE_KEY = f"{DOMAIN}.writer_entry"
+
+
+async def test_writes_batched_and_capped(hass: HomeAssistant, hass_storage) -> None:
+    """Test changes are written together and at most once per interval."""
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {"first": 1, "second": 2},
+    }
+    values = {"first": 1, "second": 2}
+    writer = EntryStateWriter(hass, "writer_entry")
+    await writer.async_load()
+    assert writer.section("first") == 1
+    writer.async_register("first", lambda: values["first"])
+    writer.async_register("second", lambda: values["second"])
+    now = dt_util.utcnow()
+
+    values["first"] = 10
+    writer.async_mark_dirty("first")
+    values["second"] = 20
+    writer.async_mark_dirty("second")
+    await hass.async_block_till_done()
+    assert hass_storage[STORAGE_KEY]["data"] == {"first": 1, "second": 2}
+
+    async_fire_time_changed(hass, now + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert hass_storage[STORAGE_KEY]["data"] == {"first": 10, "second": 20}
+
+    # The next write waits for the interval since the last one
+    values["first"] = 100
+    writer.async_mark_dirty("first")
+    async_fire_time_changed(hass, now + timedelta(seconds=12))
+    await hass.async_block_till_done()
+    assert hass_storage[STORAGE_KEY]["data"]["first"] == 10
+
+    async_fire_time_changed(hass, now + timedelta(seconds=67))
+    await hass.async_block_till_done()
+    assert hass_storage[STORAGE_KEY]["data"] == {"first": 100, "second": 20}
+
+    # Pending changes are written right away when flushing
+    values["second"] = 200
+    writer.async_mark_dirty("second")
+    await writer.async_flush()
+    assert hass_storage[STORAGE_KEY]["data"] == {"first": 100, "second": 200}
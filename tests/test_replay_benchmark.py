@@ -0,0 +1,29 @@
+"""Replay benchmark of the go-eCharger (MQTT) callback path.
+
+Run with `pytest tests/test_replay_benchmark.py -s` to print the report.
+GOE_REPLAY_LOOPS and GOE_REPLAY_SPEED loop and time-compress the capture.
+"""
+import json
+import os
+
+from homeassistant.core import HomeAssistant
+
+from .replay import BASELINE, async_replay, load_capture
+
+
+async def test_replay_capture(hass: HomeAssistant, mqtt_receive) -> None:
+    """Replay the capture and compare the counters against the baseline."""
+    stats = await async_replay(
+        hass,
+        mqtt_receive,
+        load_capture(),
+        loops=int(os.environ.get("GOE_REPLAY_LOOPS", 1)),
+        speed=float(os.environ.get("GOE_REPLAY_SPEED", 1)),
+    )
+    print()
+    print(stats.report())
+
+    result = stats.as_dict()
+    baseline = json.loads(BASELINE.read_text())
+    assert result["json_loads_per_message"] <= baseline["json_loads_per_message"]
+    assert result["state_writes_per_message"] <= baseline["state_writes_per_message"]
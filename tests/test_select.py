@@ -0,0 +1,49 @@
+"""Test the go-eCharger (MQTT) select."""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.goecharger_mqtt.definitions.select import SELECTS
+
+LMO = next(description for description in SELECTS if description.key == "lmo")
+
+
+def test_option_maps() -> None:
+    """Test the option maps are built once and payloads are normalized."""
+    for payload in ("4", "4.0", ' "4" '):
+        assert LMO.decoder(SimpleNamespace(payload=payload)) == "Eco mode"
+    assert LMO.payload_by_option["Eco mode"] == "4"
+    assert LMO.option_names == ["Default", "Eco mode", "Automatic Stop"]
+    assert set(LMO.option_by_payload) == {"3", "4", "5"}
+    with pytest.raises(KeyError):
+        LMO.decoder(SimpleNamespace(payload="4.5"))
+
+
+async def test_select_option(hass: HomeAssistant, mqtt_receive) -> None:
+    """Test options are mapped to their payload and back."""
+    mqtt_receive("/go-eCharger/000001/lmo", "3")
+    state = hass.states.get("select.go_echarger_000001_lmo")
+    assert state.state == "Default"
+    assert state.attributes["options"] == LMO.option_names
+
+    async def publish(hass, topic, payload):
+        hass.loop.call_soon(mqtt_receive, "/go-eCharger/000001/lmo/result", "ok")
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_publish",
+        side_effect=publish,
+    ) as mock_publish, patch(
+        "custom_components.goecharger_mqtt.entity.DEFAULT_SET_TIMEOUT", 0.1
+    ):
+        await hass.services.async_call(
+            "select",
+            "select_option",
+            {"entity_id": "select.go_echarger_000001_lmo", "option": "Automatic Stop"},
+            blocking=True,
+        )
+    assert mock_publish.call_args.args[1:] == ("/go-eCharger/000001/lmo/set", "5")
+
+    mqtt_receive("/go-eCharger/000001/lmo", "5.0")
+    assert hass.states.get("select.go_echarger_000001_lmo").state == "Automatic Stop"
@@ -0,0 +1,184 @@
+"""Test the go-eCharger (MQTT) sensor."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.goecharger_mqtt.const import DEFAULT_STATISTICS_WINDOWS, DOMAIN
+from custom_components.goecharger_mqtt.definitions.sensor import (
+    GOE_SENSORS,
+    VICTRON_SENSORS,
+    statistic_descriptions,
+)
+from custom_components.goecharger_mqtt.sensor import GoEChargerSensor
+
+from .replay import async_setup_chargers
+
+ACU = next(description for description in GOE_SENSORS if description.key == "acu")
+
+
+async def test_unchanged_value_not_written(hass: HomeAssistant, mqtt_receive) -> None:
+    """Test identical payloads do not cause state writes."""
+    with patch.object(
+        Entity,
+        "async_write_ha_state",
+        autospec=True,
+        side_effect=Entity.async_write_ha_state,
+    ) as mock_write:
+        mqtt_receive("/go-eCharger/000001/acu", "16")
+        assert hass.states.get("sensor.go_echarger_000001_acu").state == "16"
+        assert mock_write.call_count == 1
+
+        mqtt_receive("/go-eCharger/000001/acu", "16")
+        assert mock_write.call_count == 1
+
+        mqtt_receive("/go-eCharger/000001/acu", "32")
+        assert hass.states.get("sensor.go_echarger_000001_acu").state == "32"
+        assert mock_write.call_count == 2
+
+
+async def test_max_update_interval(hass: HomeAssistant, mqtt_receive) -> None:
+    """Test an unchanged value is written again once max_update_interval expired."""
+    with patch.object(
+        Entity,
+        "async_write_ha_state",
+        autospec=True,
+        side_effect=Entity.async_write_ha_state,
+    ) as mock_write, patch(
+        "custom_components.goecharger_mqtt.entity.time.monotonic"
+    ) as mock_monotonic:
+        mock_monotonic.return_value = 1000
+        mqtt_receive("/go-eCharger/000001/acu", "16")
+        assert mock_write.call_count == 1
+
+        mock_monotonic.return_value = 1299
+        mqtt_receive("/go-eCharger/000001/acu", "16")
+        assert mock_write.call_count == 1
+
+        mock_monotonic.return_value = 1300
+        mqtt_receive("/go-eCharger/000001/acu", "16")
+        assert mock_write.call_count == 2
+
+
+async def test_deadband(hass: HomeAssistant, mqtt_receive) -> None:
+    """Test numeric payloads within the deadband of the last write are dropped."""
+    mqtt_receive("custom/globalGrid", "-1200")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.custom_globalgrid").state == "-1200"
+
+    mqtt_receive("custom/globalGrid", "-1195")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.custom_globalgrid").state == "-1200"
+
+    mqtt_receive("custom/globalGrid", "-1190")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.custom_globalgrid").state == "-1190"
+
+    # Values which are not numbers are always written
+    mqtt_receive("custom/globalGrid", "null")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.custom_globalgrid").state == "unavailable"
+
+
+async def test_min_update_interval(hass: HomeAssistant, mqtt_receive) -> None:
+    """Test bursts within min_update_interval are coalesced into one write."""
+    with patch.object(ACU, "min_update_interval", 10):
+        mqtt_receive("/go-eCharger/000001/acu", "16")
+        assert hass.states.get("sensor.go_echarger_000001_acu").state == "16"
+
+        mqtt_receive("/go-eCharger/000001/acu", "20")
+        mqtt_receive("/go-eCharger/000001/acu", "24")
+        assert hass.states.get("sensor.go_echarger_000001_acu").state == "16"
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.go_echarger_000001_acu").state == "24"
+
+
+async def test_first_value_written_after_boot(
+    hass: HomeAssistant, mqtt_receive
+) -> None:
+    """Test the first value is written right away shortly after host boot."""
+    with patch.object(ACU, "min_update_interval", 60), patch(
+        "custom_components.goecharger_mqtt.entity.time.monotonic", return_value=5
+    ):
+        mqtt_receive("/go-eCharger/000001/acu", "16")
+        assert hass.states.get("sensor.go_echarger_000001_acu").state == "16"
+
+
+async def test_disabled_entity_not_constructed(hass: HomeAssistant) -> None:
+    """Test entities disabled in the registry are not created at all."""
+    er.async_get(hass).async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "000001-sensor-acu-0",
+        suggested_object_id="go_echarger_000001_acu",
+        disabled_by=er.RegistryEntryDisabler.USER,
+    )
+
+    with patch.object(
+        GoEChargerSensor,
+        "__init__",
+        autospec=True,
+        side_effect=GoEChargerSensor.__init__,
+    ) as mock_init:
+        await async_setup_chargers(hass, ["000001"])
+
+    descriptions = [call.args[2] for call in mock_init.mock_calls]
+    assert ACU not in descriptions
+    supported = [
+        description
+        for description in GOE_SENSORS
+        + VICTRON_SENSORS
+        + statistic_descriptions(False, DEFAULT_STATISTICS_WINDOWS)
+        + statistic_descriptions(True, DEFAULT_STATISTICS_WINDOWS)
+        if not description.disabled
+    ]
+    assert len(descriptions) == len(supported) - 1
+
+
+async def test_write_latency(hass: HomeAssistant, mqtt_receive) -> None:
+    """Test writes wait for the charger's result and their latency is recorded."""
+    mqtt_receive("/go-eCharger/000001/amp", "6")
+    mqtt_receive("/go-eCharger/000001/ama", "32")
+
+    async def publish(hass, topic, payload):
+        if topic == "/go-eCharger/000001/amp/set":
+            hass.loop.call_soon(mqtt_receive, "/go-eCharger/000001/amp/result", "ok")
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_publish",
+        side_effect=publish,
+    ) as mock_publish, patch(
+        "custom_components.goecharger_mqtt.entity.DEFAULT_SET_TIMEOUT", 0.1
+    ):
+        await hass.services.async_call(
+            "number",
+            "set_value",
+            {"entity_id": "number.go_echarger_000001_amp", "value": 16},
+            blocking=True,
+        )
+        assert mock_publish.call_args.args[1:] == ("/go-eCharger/000001/amp/set", 16)
+
+        state = hass.states.get("sensor.go_echarger_000001_write_latency")
+        assert float(state.state) >= 0
+        assert state.attributes["count"] == 1
+        assert state.attributes["timeouts"] == 0
+        assert state.attributes["buckets"]["le_inf"] == 1
+
+        with pytest.raises(HomeAssistantError):
+            await hass.services.async_call(
+                "number",
+                "set_value",
+                {"entity_id": "number.go_echarger_000001_ama", "value": 16},
+                blocking=True,
+            )
+        state = hass.states.get("sensor.go_echarger_000001_write_latency")
+        assert state.attributes["count"] == 1
+        assert state.attributes["timeouts"] == 1
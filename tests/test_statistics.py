@@ -0,0 +1,136 @@
+"""Test the go-eCharger (MQTT) rolling statistics."""
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.goecharger_mqtt.const import DOMAIN
+from custom_components.goecharger_mqtt.statistics import STATISTICS, RollingWindow
+
+from .replay import async_setup_chargers
+
+
+def test_rolling_window() -> None:
+    """Test samples leave the window by age and by capacity."""
+    samples = RollingWindow(10, 4)
+    assert samples.mean() is None
+    assert samples.percentile(0.95) is None
+
+    for timestamp, value in ((0, 5), (1, 1), (2, 3), (3, 2)):
+        samples.add(timestamp, value)
+    assert (samples.mean(), samples.min(), samples.max()) == (2.75, 1, 5)
+    assert samples.percentile(0.5) == 2
+
+    # The buffer is full, the 5 is dropped although it is within the window
+    samples.add(4, 4)
+    assert len(samples) == 4
+    assert (samples.mean(), samples.min(), samples.max()) == (2.5, 1, 4)
+    assert samples.percentile(0.95) == 4
+
+    # Only the sample of 4 is within the last 10 seconds
+    samples.add(13.5, 0)
+    assert len(samples) == 2
+    assert (samples.mean(), samples.min(), samples.max()) == (2, 0, 4)
+    assert samples.percentile(0.5) == 0
+
+
+async def test_statistic_sensors(hass: HomeAssistant) -> None:
+    """Test the statistic sensors of a power channel are fed from the nrg topic."""
+    registry = er.async_get(hass)
+    for statistic in ("mean", "max", "p95"):
+        registry.async_get_or_create(
+            "sensor",
+            DOMAIN,
+            f"000001-sensor-nrg-11-{statistic}-10s",
+            suggested_object_id=f"go_echarger_000001_nrg_11_{statistic}_10s",
+        )
+
+    with patch(
+        "custom_components.goecharger_mqtt.entity.time.monotonic"
+    ) as mock_monotonic:
+        mock_monotonic.return_value = 1000
+        receive = await async_setup_chargers(hass, ["000001"])
+
+        for second, power in enumerate((1000, 3000, 2000)):
+            mock_monotonic.return_value = 1000 + second
+            receive(
+                "/go-eCharger/000001/nrg", f"[0,0,0,0,0,0,0,0,0,0,0,{power},0,0,0,0]"
+            )
+            await hass.async_block_till_done()
+
+    assert (
+        hass.states.get("sensor.go_echarger_000001_nrg_11_mean_10s").state == "2000.0"
+    )
+    assert hass.states.get("sensor.go_echarger_000001_nrg_11_max_10s").state == "3000.0"
+    assert hass.states.get("sensor.go_echarger_000001_nrg_11_p95_10s").state == "3000.0"
+    assert registry.async_get_entity_id(
+        "sensor", DOMAIN, "000001-sensor-nrg-7-min-300s"
+    )
+    assert registry.async_get_entity_id(
+        "sensor", DOMAIN, "victron-sensor-globalGrid-mean-60s"
+    )
+    assert not hass.states.get("sensor.go_echarger_000001_nrg_7_min_300s")
+
+
+async def test_statistic_computed_when_due(hass: HomeAssistant) -> None:
+    """Test samples within the write interval are only buffered."""
+    registry = er.async_get(hass)
+    registry.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "000001-sensor-nrg-11-p95-60s",
+        suggested_object_id="go_echarger_000001_nrg_11_p95_60s",
+    )
+    p95 = MagicMock(side_effect=STATISTICS["p95"])
+
+    with patch(
+        "custom_components.goecharger_mqtt.entity.time.monotonic"
+    ) as mock_monotonic, patch.dict(
+        "custom_components.goecharger_mqtt.sensor.STATISTICS", {"p95": p95}
+    ):
+        mock_monotonic.return_value = 1000
+        receive = await async_setup_chargers(hass, ["000001"])
+
+        for power in range(1000, 1100):
+            receive(
+                "/go-eCharger/000001/nrg", f"[0,0,0,0,0,0,0,0,0,0,0,{power},0,0,0,0]"
+            )
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+        await hass.async_block_till_done()
+
+    # Computed once for the write, not for each of the samples
+    assert p95.call_count == 1
+    assert hass.states.get("sensor.go_echarger_000001_nrg_11_p95_60s").state == "1094.0"
+
+
+async def test_constant_statistic_computed_when_due(hass: HomeAssistant) -> None:
+    """Test an unchanged statistic is still only computed once per interval."""
+    registry = er.async_get(hass)
+    registry.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "000001-sensor-nrg-11-p95-60s",
+        suggested_object_id="go_echarger_000001_nrg_11_p95_60s",
+    )
+    p95 = MagicMock(side_effect=STATISTICS["p95"])
+
+    with patch(
+        "custom_components.goecharger_mqtt.entity.time.monotonic"
+    ) as mock_monotonic, patch.dict(
+        "custom_components.goecharger_mqtt.sensor.STATISTICS", {"p95": p95}
+    ):
+        mock_monotonic.return_value = 1000
+        receive = await async_setup_chargers(hass, ["000001"])
+
+        # One sample per second at night, the statistic is written once
+        for second in range(60):
+            mock_monotonic.return_value = 1000 + second
+            receive("/go-eCharger/000001/nrg", "[0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0]")
+            async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=0.5))
+            await hass.async_block_till_done()
+
+    assert p95.call_count == 10
+    assert hass.states.get("sensor.go_echarger_000001_nrg_11_p95_60s").state == "0.0"
@@ -0,0 +1,74 @@
+"""Micro-benchmark of the status code decoding.
+
+Run with `pytest tests/test_status_code_benchmark.py -s` to print the report.
+GOE_STATUS_ROUNDS sets how often the car and modelStatus messages of the
+capture are decoded.
+"""
+import os
+import time
+
+from custom_components.goecharger_mqtt.definitions import GoEChargerStatusCodes
+from custom_components.goecharger_mqtt.definitions.sensor import (
+    GOE_SENSORS,
+    transform_code,
+)
+from custom_components.goecharger_mqtt.dispatcher import GoEChargerMessage
+
+from .replay import load_capture
+
+ROUNDS = int(os.environ.get("GOE_STATUS_ROUNDS", 20000))
+KEYS = ("car", "modelStatus")
+
+
+def legacy_transform_code(mapping_table):
+    """Return the decoder as it was before the tables were compiled."""
+    codes = getattr(GoEChargerStatusCodes, mapping_table)
+
+    def decode(message) -> str:
+        try:
+            return codes[int(message.payload)]
+        except KeyError:
+            return "Definition missing for code %s" % message.payload
+
+    return decode
+
+
+def test_status_codes() -> None:
+    """Decode the status code messages of the capture and report the cost."""
+    descriptions = {
+        description.key: description
+        for description in GOE_SENSORS
+        if description.key in KEYS and description.state is transform_code
+    }
+    messages = [
+        (topic.rsplit("/", 1)[-1], GoEChargerMessage(topic, payload))
+        for _, topic, payload in load_capture()
+        if topic.rsplit("/", 1)[-1] in KEYS
+    ]
+    decoders = {
+        "legacy": {key: legacy_transform_code(key) for key in KEYS},
+        "compiled": {key: descriptions[key].decoder for key in KEYS},
+    }
+
+    # Same texts for all known and some unknown codes
+    for key in KEYS:
+        for payload in [str(code) for code in range(30)] + ["03"]:
+            message = GoEChargerMessage(key, payload)
+            assert decoders["compiled"][key](message) == decoders["legacy"][key](
+                message
+            )
+
+    print()
+    print(f"messages: {ROUNDS * len(messages)}")
+    for name, by_key in decoders.items():
+        begin = time.perf_counter()
+        for _ in range(ROUNDS):
+            for key, message in messages:
+                by_key[key](message)
+        elapsed = time.perf_counter() - begin
+        print(f"{name:<10}{elapsed / ROUNDS / len(messages) * 1e9:>8.0f} ns/message")
+
+    # Unknown codes get one cached text per payload
+    decode = decoders["compiled"]["car"]
+    unknown = GoEChargerMessage("car", "42")
+    assert decode(unknown) is decode(unknown)
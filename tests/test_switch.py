@@ -0,0 +1,61 @@
+"""Test the go-eCharger (MQTT) switch."""
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+
+
+async def test_optimistic_switch_write_fails(hass: HomeAssistant, mqtt_receive) -> None:
+    """Test the optimistic state is rolled back when a write fails."""
+    mqtt_receive("/go-eCharger/000001/sua", "false")
+    await hass.async_block_till_done()
+    assert hass.states.get("switch.go_echarger_000001_sua").state == "off"
+    states_while_publishing = []
+
+    async def publish_unconfirmed(hass, topic, payload):
+        states_while_publishing.append(
+            hass.states.get("switch.go_echarger_000001_sua").state
+        )
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_publish",
+        side_effect=publish_unconfirmed,
+    ), patch(
+        "custom_components.goecharger_mqtt.entity.DEFAULT_SET_TIMEOUT", 0
+    ), pytest.raises(
+        HomeAssistantError, match="did not confirm"
+    ):
+        await hass.services.async_call(
+            "switch",
+            "turn_on",
+            {"entity_id": "switch.go_echarger_000001_sua"},
+            blocking=True,
+        )
+    # Written right away, restored once the charger did not confirm
+    assert states_while_publishing == ["on"]
+    assert hass.states.get("switch.go_echarger_000001_sua").state == "off"
+
+    mqtt_receive("/go-eCharger/000001/sua", "true")
+    await hass.async_block_till_done()
+
+    async def publish_rejected(hass, topic, payload):
+        hass.loop.call_soon(
+            mqtt_receive, "/go-eCharger/000001/sua/result", "value out of range"
+        )
+
+    with patch(
+        "custom_components.goecharger_mqtt.dispatcher.mqtt.async_publish",
+        side_effect=publish_rejected,
+    ), patch(
+        "custom_components.goecharger_mqtt.entity.DEFAULT_SET_TIMEOUT", 0.1
+    ), pytest.raises(
+        HomeAssistantError, match="value out of range"
+    ):
+        await hass.services.async_call(
+            "switch",
+            "turn_off",
+            {"entity_id": "switch.go_echarger_000001_sua"},
+            blocking=True,
+        )
+    assert hass.states.get("switch.go_echarger_000001_sua").state == "on"